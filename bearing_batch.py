@@ -0,0 +1,109 @@
+import numpy as np
+
+from final_project import FLOOR_WEIGHT
+
+"""
+File: bearing_batch.py
+
+Vectorized versions of the bearing capacity checks in final_project.py.
+Every argument may be a scalar or a NumPy array; arrays are broadcast
+against each other so one call evaluates a whole set of footing designs.
+The numbers match compute_bearing_factors_exact, compute_applied_pressure and
+compute_ultimate_capacity, including Nc = 5.7 when φ = 0. The tabulated
+compute_bearing_factors agrees to within its interpolation error bound.
+"""
+
+
+def compute_bearing_factors_batch(friction_angle):
+    """
+    Array version of `final_project.compute_bearing_factors_exact`.
+
+    Args:
+        friction_angle: friction angle(s) φ in degrees
+
+    Returns:
+        Nc, Nq and Ng as float arrays with the shape of friction_angle.
+    """
+    friction_angle = np.asarray(friction_angle, dtype=float)
+    phi = np.radians(friction_angle)
+    tan_phi = np.tan(phi)
+
+    Nq = np.exp(2 * np.pi * (0.75 - friction_angle / 360) * tan_phi) \
+        / (2 * np.cos(np.radians(45 + friction_angle / 2)) ** 2)
+
+    # Nc is 5.7 for φ = 0, avoid dividing by tan(0) for those entries
+    positive = friction_angle > 0
+    safe_tan = np.where(positive, tan_phi, 1.0)
+    Nc = np.where(positive, (Nq - 1) / safe_tan, 5.7)
+
+    Kp = np.tan(np.radians(45 + friction_angle / 2)) ** 2
+    Ng = 0.5 * tan_phi * (Kp / np.cos(phi) ** 2 - 1)
+    return Nc, Nq, Ng
+
+
+def compute_applied_pressure_batch(foundation_width, number_of_floors, building_area, num_footings=1):
+    """
+    Array version of `final_project.compute_applied_pressure`.
+
+    Args:
+        foundation_width: footing width(s) B in m
+        number_of_floors: number of floors
+        building_area: building floor area(s) in m²
+        num_footings: number of footings sharing the load (1 for a raft)
+
+    Returns:
+        the pressure under one footing in kN/m².
+    """
+    total_load = FLOOR_WEIGHT * np.asarray(number_of_floors, dtype=float) * np.asarray(building_area, dtype=float)
+    area_per_footing = np.asarray(foundation_width, dtype=float) ** 2
+    return total_load / np.asarray(num_footings, dtype=float) / area_per_footing
+
+
+def compute_ultimate_capacity_batch(cohesion, friction_angle, unit_weight, foundation_depth, foundation_width):
+    """
+    Array version of `final_project.compute_ultimate_capacity`:
+    q_ult = c * Nc + gamma * D * Nq + 0.5 * gamma * B * Ng
+
+    Returns:
+        q_ult in kN/m², followed by the Nc, Nq and Ng arrays used to compute it.
+    """
+    Nc, Nq, Ng = compute_bearing_factors_batch(friction_angle)
+    cohesion = np.asarray(cohesion, dtype=float)
+    unit_weight = np.asarray(unit_weight, dtype=float)
+    q_ult = cohesion * Nc \
+        + unit_weight * np.asarray(foundation_depth, dtype=float) * Nq \
+        + 0.5 * unit_weight * np.asarray(foundation_width, dtype=float) * Ng
+    return q_ult, Nc, Nq, Ng
+
+
+def footings_for_type(foundation_type, num_footings):
+    """
+    Returns the number of footings that share the load, forcing 1 wherever the
+    foundation type is a raft ("R") as main does.
+    """
+    foundation_type = np.asarray(foundation_type)
+    return np.where(foundation_type == "R", 1, np.asarray(num_footings))
+
+
+def evaluate_designs(cohesion, friction_angle, unit_weight, foundation_depth, foundation_width,
+                     number_of_floors, building_area, num_footings=1):
+    """
+    Runs the complete check from main for many designs in one vectorized pass.
+    Depth and width are in m, as returned by `final_project.foundation_properties`.
+
+    Returns:
+        a dict of arrays with keys "Nc", "Nq", "Ng", "q_ult", "q_applied" and "safe",
+        where safe is True when q_applied < q_ult.
+    """
+    q_ult, Nc, Nq, Ng = compute_ultimate_capacity_batch(cohesion, friction_angle, unit_weight,
+                                                        foundation_depth, foundation_width)
+    q_applied = compute_applied_pressure_batch(foundation_width, number_of_floors, building_area, num_footings)
+    q_ult, q_applied = np.broadcast_arrays(q_ult, q_applied)
+    return {
+        "Nc": Nc,
+        "Nq": Nq,
+        "Ng": Ng,
+        "q_ult": q_ult,
+        "q_applied": q_applied,
+        "safe": q_applied < q_ult,
+    }
@@ -0,0 +1,358 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+"""
+File: benchmarks.py
+
+Benchmarks for Stand or Sink.
+
+    python benchmarks.py run [--repeat N] [--output results.json]
+    python benchmarks.py startup [--repeat N] [--output startup.json]
+    python benchmarks.py compare old.json new.json [--threshold 0.1]
+
+"run" times the hot paths:
+    bearing_factors_scalar    compute_bearing_factors over 10000 new angles
+    bearing_factors_cached    compute_bearing_factors over 1000 angles, ten times each
+    bearing_factors_batch     compute_bearing_factors_batch on 1000000 angles
+    draw_soil[<soil>]         draw_soil for each soil type in soils.json
+    draw_foundation[R|I]      a raft and four isolated footings
+    move_soil[<n> footings]   one move_soil_particles step in loose sand
+    cloud_frame               one frame of the animate_clouds animation
+
+Drawing and animation run on a HeadlessCanvas unless --display is given and a
+display is available, and random numbers are seeded, so runs are repeatable.
+
+"startup" measures, each in a fresh Python process:
+    import_final_project  time to import final_project, which must not load tkinter
+    import_graphics       time to import graphics (and with it tkinter)
+    first_frame           time from a bare interpreter to the scene and soil drawn
+                          on screen: imports, Tk window, sky, clouds and loose sand
+Without a display the first frame is drawn on a HeadlessCanvas, which leaves
+out the Tk window; pass --headless to force that.
+
+Every timing is repeated and reported as the median and minimum in seconds.
+Both commands can save their results as JSON, and "compare" lists every
+benchmark whose median got slower by more than the threshold (10% by default)
+and exits with status 1 if there are any.
+"""
+
+DEFAULT_REPEAT = 7
+DEFAULT_THRESHOLD = 0.1
+SEED = 2024
+
+MOVE_SOIL_FOOTINGS = [1, 2, 4, 8, 16]
+
+IMPORT_FINAL_PROJECT = """
+import sys, time
+start = time.perf_counter()
+import final_project
+seconds = time.perf_counter() - start
+if "tkinter" in sys.modules:
+    raise SystemExit("importing final_project loaded tkinter")
+print(seconds)
+"""
+
+IMPORT_GRAPHICS = """
+import time
+start = time.perf_counter()
+import graphics
+print(time.perf_counter() - start)
+"""
+
+FIRST_FRAME = """
+import time
+start = time.perf_counter()
+import final_project
+canvas = final_project.create_scene()[0]
+final_project.draw_soil(canvas, "LS")
+canvas.update()
+print(time.perf_counter() - start)
+"""
+
+STARTUP_BENCHMARKS = {
+    "import_final_project": IMPORT_FINAL_PROJECT,
+    "import_graphics": IMPORT_GRAPHICS,
+    "first_frame": FIRST_FRAME,
+}
+
+
+def has_display():
+    return not sys.platform.startswith("linux") or bool(os.environ.get("DISPLAY"))
+
+
+def time_in_subprocess(code, headless=False):
+    """
+    Runs code in a new interpreter started in this directory and returns the number of seconds it prints.
+    """
+    env = dict(os.environ)
+    if headless:
+        env["GRAPHICS_HEADLESS"] = "1"
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return float(result.stdout.split()[-1])
+
+
+def measure(run, setup=None, repeat=DEFAULT_REPEAT, number=1):
+    """
+    Times run(state) where state is what setup() returns, so the setup is not timed.
+
+    Args:
+        run: the function to time
+        setup: makes a fresh state before every repeat, or None to pass None
+        repeat: number of timed repeats
+        number: calls of run per repeat; the timing is per call
+
+    Returns:
+        the seconds per call of every repeat.
+    """
+    import numpy as np
+    seconds = []
+    for _ in range(repeat):
+        random.seed(SEED)
+        np.random.seed(SEED)
+        state = setup() if setup else None
+        start = time.perf_counter()
+        for _ in range(number):
+            run(state)
+        seconds.append((time.perf_counter() - start) / number)
+    return seconds
+
+
+def summarize(seconds):
+    """
+    Returns a dict with the "median", "min" and "max" of a list of timings and the "repeat" count.
+    """
+    return {
+        "median": statistics.median(seconds),
+        "min": min(seconds),
+        "max": max(seconds),
+        "repeat": len(seconds),
+    }
+
+
+def suite_benchmarks(headless=True):
+    """
+    Returns a dict of benchmark name -> (run, setup, number), see `measure`.
+    """
+    import numpy as np
+    import final_project
+    from bearing_batch import compute_bearing_factors_batch
+    from graphics import Canvas
+    from soils import get_registry
+
+    def new_canvas():
+        return Canvas(final_project.CANVAS_WIDTH, final_project.CANVAS_HEIGHT, headless=headless)
+
+    # 10000 different angles, and 1000 angles (they fit in the memo cache) ten times over
+    new_angles = np.linspace(0, 45, 10000).tolist()
+    repeated_angles = np.tile(np.linspace(0, 45, 1000), 10).tolist()
+
+    def bearing_factors(angles):
+        for angle in angles:
+            final_project.compute_bearing_factors(angle)
+
+    def cold_cache():
+        final_project.compute_bearing_factors.cache_clear()
+        return new_angles
+
+    def warm_cache():
+        bearing_factors(repeated_angles)
+        return repeated_angles
+
+    benchmarks = {
+        "bearing_factors_scalar": (bearing_factors, cold_cache, 1),
+        "bearing_factors_cached": (bearing_factors, warm_cache, 1),
+        "bearing_factors_batch": (lambda state: compute_bearing_factors_batch(state),
+                                  lambda: np.random.uniform(0, 45, 1_000_000), 1),
+    }
+
+    for soil_type in get_registry().codes():
+        benchmarks[f"draw_soil[{soil_type}]"] = (
+            lambda canvas, soil_type=soil_type: final_project.draw_soil(canvas, soil_type), new_canvas, 1)
+
+    benchmarks["draw_foundation[R]"] = (
+        lambda canvas: final_project.draw_foundation(canvas, "R", 1.5, 3), new_canvas, 1)
+    benchmarks["draw_foundation[I]"] = (
+        lambda canvas: final_project.draw_foundation(canvas, "I", 1.5, 3, 4), new_canvas, 1)
+
+    for num_footings in MOVE_SOIL_FOOTINGS:
+        def soil_and_footings(num_footings=num_footings):
+            canvas = new_canvas()
+            soil_particles = final_project.draw_soil(canvas, "LS")
+            foundation = final_project.draw_foundation(canvas, "I", 0.6, 0.6, num_footings)
+            return canvas, soil_particles, foundation
+
+        benchmarks[f"move_soil[{num_footings} footings]"] = (
+            lambda state: final_project.move_soil_particles(*state), soil_and_footings, 1)
+
+    def clouds():
+        # The same three clouds as create_scene
+        canvas = new_canvas()
+        frames = final_project.cloud_frames(canvas,
+                                            final_project.draw_cloud(canvas, 20, 70, "white"),
+                                            final_project.draw_cloud(canvas, 270, 20, "white"),
+                                            final_project.draw_cloud(canvas, 270, 70, "white"))
+        return canvas, frames
+
+    def cloud_frame(state):
+        canvas, frames = state
+        next(frames)
+        canvas.update()
+
+    benchmarks["cloud_frame"] = (cloud_frame, clouds, 100)
+    return benchmarks
+
+
+def bench_suite(repeat=DEFAULT_REPEAT, headless=True, only=None):
+    """
+    Runs the hot path benchmarks.
+
+    Args:
+        repeat: number of timed repeats per benchmark
+        headless: draw on a HeadlessCanvas instead of a Tk window
+        only: if given, run only the benchmarks whose name contains this text
+
+    Returns:
+        a dict of benchmark name -> summary (see `summarize`).
+    """
+    results = {}
+    for name, (run, setup, number) in suite_benchmarks(headless).items():
+        if only and only not in name:
+            continue
+        results[name] = summarize(measure(run, setup, repeat, number))
+    return results
+
+
+def bench_startup(repeat=DEFAULT_REPEAT, headless=None):
+    """
+    Runs the startup benchmarks.
+
+    Args:
+        repeat: number of fresh processes per benchmark
+        headless: draw the first frame without a window; by default only when there is no display
+
+    Returns:
+        a dict of benchmark name -> summary (see `summarize`).
+    """
+    if headless is None:
+        headless = not has_display()
+    results = {}
+    for name, code in STARTUP_BENCHMARKS.items():
+        results[name] = summarize([time_in_subprocess(code, headless) for _ in range(repeat)])
+    return results
+
+
+def environment(headless):
+    """
+    Returns what the results depend on, stored next to them.
+    """
+    import numpy as np
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "headless": headless,
+    }
+
+
+def compare(old, new, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares the medians of two saved runs.
+
+    Args:
+        old, new: results as saved by `save_results`
+        threshold: relative slowdown of the median counted as a regression
+
+    Returns:
+        a list of (name, old median, new median, ratio) for the benchmarks in both runs, and
+        the names of those that regressed.
+    """
+    rows = []
+    regressions = []
+    for name, summary in new["results"].items():
+        if name not in old["results"]:
+            continue
+        old_median = old["results"][name]["median"]
+        ratio = summary["median"] / old_median if old_median > 0 else float("inf")
+        rows.append((name, old_median, summary["median"], ratio))
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def save_results(path, results, headless):
+    with open(path, "w") as output:
+        json.dump({"environment": environment(headless), "results": results}, output, indent=2)
+
+
+def load_results(path):
+    with open(path) as saved:
+        return json.load(saved)
+
+
+def print_results(results):
+    for name, summary in results.items():
+        print(f"{name:<28} median {summary['median'] * 1000:10.3f} ms   min {summary['min'] * 1000:10.3f} ms")
+
+
+def print_comparison(rows, regressions, threshold):
+    for name, old_median, new_median, ratio in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<28} {old_median * 1000:10.3f} ms -> {new_median * 1000:10.3f} ms  {ratio:6.2f}x{flag}")
+    print()
+    print(f"{len(regressions)} of {len(rows)} benchmarks more than {threshold:.0%} slower")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand or Sink benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="compute, drawing and animation hot paths")
+    run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run.add_argument("--display", action="store_true", help="draw in a Tk window instead of headless")
+    run.add_argument("--only", help="run only the benchmarks whose name contains this text")
+    run.add_argument("--output", help="also save the results to this JSON file")
+
+    startup = commands.add_parser("startup", help="import and first frame latency")
+    startup.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    startup.add_argument("--headless", action="store_true", default=None,
+                         help="draw the first frame on a HeadlessCanvas")
+    startup.add_argument("--output", help="also save the results to this JSON file")
+
+    compare_runs = commands.add_parser("compare", help="flag regressions between two saved runs")
+    compare_runs.add_argument("old")
+    compare_runs.add_argument("new")
+    compare_runs.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                              help="relative slowdown counted as a regression (default 0.1)")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        rows, regressions = compare(load_results(args.old), load_results(args.new), args.threshold)
+        print_comparison(rows, regressions, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    if args.command == "run":
+        headless = not (args.display and has_display())
+        results = bench_suite(args.repeat, headless, args.only)
+    else:
+        headless = args.headless if args.headless is not None else not has_display()
+        results = bench_startup(args.repeat, headless)
+    print_results(results)
+    if args.output:
+        save_results(args.output, results, headless)
+
+
+if __name__ == "__main__":
+    main()
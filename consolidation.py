@@ -0,0 +1,255 @@
+import math
+
+import numpy as np
+
+"""
+File: consolidation.py
+
+Settlement against time for footings on the clay soils, those with
+consolidation coefficients in soils.json (SC and SIC).
+
+Under the footing the load is first carried by the pore water, and the
+clay only settles as that excess pore pressure u drains away. Terzaghi's 1D
+consolidation equation
+
+    du/dt = cv * d²u/dz²
+
+is solved on a uniform grid of depth nodes below the foundation with the
+Crank-Nicolson scheme, which stays stable for any time step and is second
+order accurate in time. At the start u jumps to 0 at the drained boundary
+and the settlement grows like the square root of time, which Crank-Nicolson
+follows badly (and rings), so the first STARTUP_STEPS steps are each taken
+as STARTUP_SUBSTEPS small backward Euler steps instead. Each kind of step
+always uses the same tridiagonal matrix, so both matrices are reduced once
+(cyclic reduction) and a step only replays the reduction on the right-hand
+sides. The right-hand sides of all footings are solved together as the
+columns of one array, and the settlement after every step is
+
+    s(t) = mv * integral of (Δσ(z) - u(z, t)) dz
+
+Initially u equals the stress increase Δσ under the footing, spread 2:1 with
+depth (Δσ = q * B² / (B + z)², the square footing of compute_applied_pressure).
+Time is in years, depth and width in m, pressure in kN/m² and settlement in mm.
+
+With the default grid the degree of consolidation U(t) = s(t) / s_final
+under a uniform load stays within 3e-4 of Terzaghi's series
+(terzaghi_degree), for both soils and both drainage conditions; see
+tests/test_consolidation.py.
+"""
+
+LAYER_THICKNESS = 10.0
+DEFAULT_YEARS = 50.0
+DEFAULT_NODES = 1000
+DEFAULT_STEPS = 1000
+# The first time steps are each split into backward Euler substeps
+STARTUP_STEPS = 2
+STARTUP_SUBSTEPS = 64
+
+
+def settlement_curve(soil_type, q_applied, foundation_width, years=DEFAULT_YEARS,
+                     layer_thickness=LAYER_THICKNESS, drainage="double", nodes=DEFAULT_NODES,
+                     steps=DEFAULT_STEPS):
+    """
+    Consolidation settlement against time under one or more footings.
+
+    Args:
+        soil_type: code of a soil with "consolidation" coefficients in soils.json, the coefficient of
+            consolidation cv (m²/year) and of volume compressibility mv (m²/kN)
+        q_applied: applied pressure(s) in kN/m², one per footing
+        foundation_width: footing width(s) in m, broadcast against q_applied
+        years: length of the time series
+        layer_thickness: thickness of the clay below the foundation in m
+        drainage: "double" if water drains out of the top and bottom of the clay,
+            "single" if the bottom is impermeable
+        nodes: number of depth intervals
+        steps: number of time steps
+
+    Returns:
+        a dict with
+            "time": the steps + 1 times in years, starting at 0
+            "settlement": settlement in mm, one row per time and one column per footing
+            "final_settlement": settlement once consolidation is over, in mm, per footing
+    """
+    from soils import get_soil
+    properties = get_soil(soil_type).consolidation
+    if properties is None:
+        raise ValueError(f"consolidation is not modelled for {soil_type}")
+    if drainage not in ("single", "double"):
+        raise ValueError("drainage must be 'single' or 'double'")
+    cv = properties["cv"]
+    mv = properties["mv"]
+
+    q_applied, foundation_width = np.broadcast_arrays(np.asarray(q_applied, dtype=float),
+                                                      np.asarray(foundation_width, dtype=float))
+    shape = q_applied.shape
+    q_applied = q_applied.reshape(1, -1)
+    foundation_width = foundation_width.reshape(1, -1)
+
+    dz = layer_thickness / nodes
+    dt = years / steps
+    z = np.linspace(0, layer_thickness, nodes + 1).reshape(-1, 1)
+    stress = q_applied * foundation_width ** 2 / (foundation_width + z) ** 2
+
+    # Trapezoid rule weights over the depth nodes
+    weights = np.full((nodes + 1, 1), dz)
+    weights[0] = weights[-1] = dz / 2
+    final = mv * (weights * stress).sum(axis=0)
+
+    # The top node always drains; so does the bottom one with double drainage
+    unknown = slice(1, nodes) if drainage == "double" else slice(1, nodes + 1)
+    size = len(range(nodes + 1)[unknown])
+    solver = TridiagonalSolver(*_implicit_matrix(cv * dt / dz ** 2 / 2, size, drainage))
+    startup = TridiagonalSolver(*_implicit_matrix(cv * dt / dz ** 2 / STARTUP_SUBSTEPS, size, drainage))
+
+    # Drained nodes have no pore pressure left, so only the unknowns hold back settlement
+    pore_pressure = np.zeros((solver.padded, q_applied.shape[1]))
+    pore_pressure[:solver.size] = stress[unknown]
+    pore_weights = np.zeros(solver.padded)
+    pore_weights[:solver.size] = mv * weights[unknown, 0]
+    settlement = np.empty((steps + 1, q_applied.shape[1]))
+    settlement[0] = 0.0
+    for step in range(1, steps + 1):
+        if step <= STARTUP_STEPS:
+            # Backward Euler substeps, (I + (r/k)A) u_new = u_old
+            for _ in range(STARTUP_SUBSTEPS):
+                pore_pressure = startup.solve_padded(pore_pressure)
+        else:
+            # Crank-Nicolson: (I + (r/2)A) u_new = (I - (r/2)A) u_old = 2 u_old - (I + (r/2)A) u_old
+            pore_pressure = solver.solve_padded(2 * pore_pressure - solver.multiply_padded(pore_pressure))
+        settlement[step] = final - pore_weights @ pore_pressure
+
+    return {
+        "time": np.linspace(0, years, steps + 1),
+        "settlement": settlement.reshape((steps + 1,) + shape) * 1000,
+        "final_settlement": final.reshape(shape) * 1000,
+    }
+
+
+def time_to_degree(curve, degree=0.9):
+    """
+    Returns the time in years until a given fraction of the final settlement is reached, per footing,
+    or NaN where the curve does not get there.
+    """
+    settlement = curve["settlement"].reshape(len(curve["time"]), -1)
+    final = np.asarray(curve["final_settlement"]).reshape(-1)
+    reached = settlement >= degree * final
+    first = np.argmax(reached, axis=0)
+    times = np.where(reached.any(axis=0), curve["time"][first], np.nan)
+    return times.reshape(np.shape(curve["final_settlement"]))
+
+
+def terzaghi_degree(time_factor, terms=200):
+    """
+    Terzaghi's average degree of consolidation U(Tv) for a uniform initial pore pressure, the series
+    1 - sum(2 / M² * exp(-M² * Tv)) with M = π(2m + 1)/2. tests/test_consolidation.py checks the solver
+    against it.
+    """
+    time_factor = np.asarray(time_factor, dtype=float)
+    M = math.pi * (2 * np.arange(terms) + 1) / 2
+    return 1 - (2 / M ** 2 * np.exp(-np.multiply.outer(time_factor, M ** 2))).sum(axis=-1)
+
+
+def _implicit_matrix(r, size, drainage):
+    # Backward Euler rows: -r u[i-1] + (1 + 2r) u[i] - r u[i+1] = u_old[i]
+    lower = np.full(size, -r)
+    diagonal = np.full(size, 1 + 2 * r)
+    upper = np.full(size, -r)
+    lower[0] = 0.0
+    upper[-1] = 0.0
+    if drainage == "single":
+        # No flow through the bottom: mirror node below it, u[n+1] = u[n-1]
+        lower[-1] = -2 * r
+    return lower, diagonal, upper
+
+
+class TridiagonalSolver:
+    """
+    Solves lower[i] x[i-1] + diagonal[i] x[i] + upper[i] x[i+1] = d[i] for many right-hand sides with the same
+    matrix. The matrix is reduced once by cyclic reduction; a solve then replays the reduction on the right-hand
+    sides in 2 log2(n) whole-array steps, so no Python loop runs over the rows.
+    """
+
+    def __init__(self, lower, diagonal, upper):
+        self.size = len(diagonal)
+        # Pad with identity rows to 2^k - 1 rows, which cyclic reduction splits evenly
+        levels = max(1, math.ceil(math.log2(self.size + 1)))
+        padded = 2 ** levels - 1
+        a = np.zeros(padded)
+        b = np.ones(padded)
+        c = np.zeros(padded)
+        a[:self.size] = lower
+        b[:self.size] = diagonal
+        c[:self.size] = upper
+        self.padded = padded
+        # The unreduced matrix, for multiply_padded
+        self.matrix = (a[1:, None].copy(), b[:, None].copy(), c[:-1, None].copy())
+
+        # Reduction at stride h updates rows 2h-1, 4h-1, ... from their neighbours h rows away
+        self.forward = []
+        for level in range(levels - 1):
+            h = 2 ** level
+            rows = _rows(2 * h - 1, padded - h, 2 * h)
+            left = _shift(rows, -h)
+            right = _shift(rows, h)
+            alpha = -a[rows] / b[left]
+            gamma = -c[rows] / b[right]
+            self.forward.append((rows, left, right, alpha[:, None], gamma[:, None]))
+            b[rows] += alpha * c[left] + gamma * a[right]
+            a[rows] = alpha * a[left]
+            c[rows] = gamma * c[right]
+
+        # Back substitution at stride h solves rows h-1, 3h-1, ... from the rows already solved.
+        # x is stored one row down with a zero row on each side, so the first and last rows need no special case.
+        self.backward = []
+        for level in reversed(range(levels)):
+            h = 2 ** level
+            rows = _rows(h - 1, padded, 2 * h)
+            stored = _shift(rows, 1)
+            self.backward.append((rows, stored, _shift(stored, -h), _shift(stored, h),
+                                  a[rows][:, None], b[rows][:, None], c[rows][:, None]))
+
+    def solve(self, d):
+        """
+        Args:
+            d: right-hand sides, one row per matrix row and one column per system
+
+        Returns:
+            the solutions, the same shape as d.
+        """
+        d = np.asarray(d, dtype=float)
+        columns = d.reshape(self.size, -1)
+        rhs = np.zeros((self.padded, columns.shape[1]))
+        rhs[:self.size] = columns
+        return self.solve_padded(rhs)[:self.size].reshape(d.shape)
+
+    def solve_padded(self, rhs):
+        """
+        Same as `TridiagonalSolver.solve` for right-hand sides already padded with zero rows to `self.padded`
+        rows. rhs is overwritten, and the solution has the same padded shape.
+        """
+        for rows, left, right, alpha, gamma in self.forward:
+            rhs[rows] += alpha * rhs[left] + gamma * rhs[right]
+        x = np.zeros((self.padded + 2, rhs.shape[1]))
+        for rows, stored, left, right, a, b, c in self.backward:
+            x[stored] = (rhs[rows] - a * x[left] - c * x[right]) / b
+        return x[1:-1]
+
+    def multiply_padded(self, x):
+        """
+        Returns the matrix times x, for x padded like the right-hand sides of `TridiagonalSolver.solve_padded`.
+        """
+        a, b, c = self.matrix
+        product = b * x
+        product[1:] += a * x[:-1]
+        product[:-1] += c * x[1:]
+        return product
+
+
+def _rows(start, stop, step):
+    # Every step-th row from start while below stop, as a slice
+    count = len(range(start, stop, step))
+    return slice(start, start + count * step, step)
+
+
+def _shift(rows, offset):
+    return slice(rows.start + offset, rows.stop + offset, rows.step)
@@ -0,0 +1,250 @@
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+
+import final_project
+from soils import get_registry, refresh_registry
+
+"""
+File: design_cache.py
+
+Remembers the results of final_project.evaluate_design, in memory and on
+disk, so parameter studies that check the same designs again and again, in
+one run or over many, only compute each one once.
+
+A lookup first tries an in-process least-recently-used cache, then an
+SQLite file, and only then evaluates the design and stores the result in
+both. The inputs are first written out in one canonical form (numbers as
+floats and 1 footing for a raft, so designs that evaluate the same look the
+same). The memory cache is keyed by that tuple, and rows in the file by a
+SHA-256 hash of it together with the formula version.
+
+The formula version is a hash of FORMULA_VERSION, FLOOR_WEIGHT, the bearing
+factor table settings, what compute_bearing_factors returns at a set of
+probe angles, and the names, median properties and bearing factors the soil
+registry holds, which are what evaluate_design uses. When any of them
+change, old results no longer match: the in-memory cache is cleared and
+rows stored under another version are deleted from the file.
+
+Every lookup checks whether FLOOR_WEIGHT, compute_bearing_factors or
+compute_median_properties were replaced in final_project. If so, the soil
+registry works out its medians and bearing factors again (see
+soils.refresh_registry) before the version is, so the results stored after
+that come from the new functions. Other changes, e.g. editing
+evaluate_design, are not noticed while the program runs: bump
+FORMULA_VERSION when making them.
+
+Example:
+    with DesignCache("designs.sqlite") as cache:
+        result = cache.evaluate("SC", 1.0, 1.5, 2, 100, "I", 4)
+        cache.stats()["hit_rate"]
+"""
+
+FORMULA_VERSION = 1
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "design_cache.sqlite")
+DEFAULT_MAX_SIZE = 4096
+# Writes are committed in groups, and on flush or close
+COMMIT_EVERY = 256
+
+PROBE_ANGLES = [0, 1, 5, 12.345, 20, 28.5, 33.3, 40, 45.67, 50, 55]
+
+
+def formula_fingerprint():
+    """
+    Returns the formula version, a hex digest of everything a cached result depends on besides its inputs.
+    """
+    soils = list(get_registry())
+    description = {
+        "formula_version": FORMULA_VERSION,
+        "floor_weight": final_project.FLOOR_WEIGHT,
+        "bearing_table": [final_project.BEARING_TABLE_MIN_ANGLE, final_project.BEARING_TABLE_MAX_ANGLE,
+                          final_project.BEARING_TABLE_STEP],
+        "bearing_factors": [list(final_project.compute_bearing_factors(angle)) for angle in PROBE_ANGLES],
+        "soils": [[soil.code, soil.name] + list(soil.medians) + list(soil.bearing_factors) for soil in soils],
+    }
+    return _digest(description)
+
+
+def canonical_design(soil_type, foundation_depth, foundation_width, number_of_floors, building_area,
+                     foundation_type, num_footings=1):
+    """
+    Returns the inputs of `final_project.evaluate_design` as a tuple in one canonical form, so designs that
+    evaluate the same also look the same.
+    """
+    return (
+        str(soil_type),
+        float(foundation_depth),
+        float(foundation_width),
+        float(number_of_floors),
+        float(building_area),
+        str(foundation_type),
+        # evaluate_design ignores the footing count of a raft
+        1.0 if foundation_type == "R" else float(num_footings),
+    )
+
+
+class DesignCache:
+    """
+    `final_project.evaluate_design` behind an in-memory LRU cache and an SQLite file.
+    """
+
+    def __init__(self, file_path=DEFAULT_CACHE_FILE, max_size=DEFAULT_MAX_SIZE):
+        """
+        Args:
+            file_path: the SQLite file to keep results in, created if needed, or None to only cache in memory
+            max_size: number of results kept in memory
+        """
+        self.file_path = file_path
+        self.max_size = max_size
+        self.results = collections.OrderedDict()
+        self.connection = None
+        self.pending_writes = 0
+        if file_path is not None:
+            self.connection = sqlite3.connect(file_path)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results "
+                                    "(key TEXT PRIMARY KEY, version TEXT NOT NULL, result TEXT NOT NULL)")
+        self.version = None
+        self.check_version()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def check_version(self):
+        """
+        Works out the formula version again if FLOOR_WEIGHT, compute_bearing_factors or compute_median_properties
+        changed since it was last worked out, after refreshing the soil registry, and invalidates the cached
+        results if it differs.
+
+        Returns:
+            True if the cached results were invalidated.
+        """
+        formulas = (final_project.FLOOR_WEIGHT, final_project.compute_bearing_factors,
+                    final_project.compute_median_properties)
+        if self.version is not None and formulas[0] == self.formulas[0] \
+                and all(new is old for new, old in zip(formulas[1:], self.formulas[1:])):
+            return False
+        # The soils may hold medians and bearing factors from older functions
+        refresh_registry()
+        self.formulas = formulas
+        version = formula_fingerprint()
+        if version == self.version:
+            return False
+        self.version = version
+        self.results.clear()
+        if self.connection is not None:
+            self.connection.execute("DELETE FROM results WHERE version != ?", (version,))
+            self.connection.commit()
+        return True
+
+    def key(self, *design):
+        """
+        Returns the key of a design in the file, given as the arguments of `final_project.evaluate_design`.
+        """
+        return _digest([self.version, *canonical_design(*design)])
+
+    def evaluate(self, soil_type, foundation_depth, foundation_width, number_of_floors, building_area,
+                 foundation_type, num_footings=1):
+        """
+        Same as `final_project.evaluate_design`, answered from the cache when the design was seen before.
+        The result is a new dict every time, so callers may change it.
+        """
+        design = (soil_type, foundation_depth, foundation_width, number_of_floors, building_area,
+                  foundation_type, num_footings)
+        self.check_version()
+        # The memory cache is emptied whenever the version changes, so it needs no version in its keys
+        canonical = canonical_design(*design)
+        if canonical in self.results:
+            self.memory_hits += 1
+            self.results.move_to_end(canonical)
+            return dict(self.results[canonical])
+
+        result = None
+        if self.connection is not None:
+            key = _digest([self.version, *canonical])
+            row = self.connection.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                result = json.loads(row[0])
+        if result is None:
+            self.misses += 1
+            result = final_project.evaluate_design(*design)
+            if self.connection is not None:
+                self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                                        (key, self.version, json.dumps(result)))
+                self.pending_writes += 1
+                if self.pending_writes >= COMMIT_EVERY:
+                    self.flush()
+
+        self.results[canonical] = result
+        self.shrink()
+        return dict(result)
+
+    def shrink(self):
+        while len(self.results) > self.max_size:
+            self.results.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Forgets every result, in memory and in the file.
+        """
+        self.results.clear()
+        if self.connection is not None:
+            self.connection.execute("DELETE FROM results")
+            self.connection.commit()
+            self.pending_writes = 0
+
+    def flush(self):
+        """
+        Commits the results not yet written to the file.
+        """
+        if self.connection is not None and self.pending_writes:
+            self.connection.commit()
+            self.pending_writes = 0
+
+    def close(self):
+        self.flush()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self):
+        """
+        Returns a dict with the number of "memory_hits", "disk_hits", "misses" and "evictions", the "hit_rate"
+        (hits of either kind over all lookups), the "size" and "max_size" of the memory cache, the number of
+        results in the file as "stored", and the formula "version".
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        stored = 0
+        if self.connection is not None:
+            stored = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "size": len(self.results),
+            "max_size": self.max_size,
+            "stored": stored,
+            "version": self.version,
+        }
+
+
+def _digest(value):
+    # json.dumps writes floats with repr, which round-trips them exactly
+    return hashlib.sha256(json.dumps(value, separators=(",", ":")).encode("utf-8")).hexdigest()
@@ -0,0 +1,372 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+import traceback
+
+import numpy as np
+
+from bearing_batch import compute_applied_pressure_batch, footings_for_type
+from soils import get_registry
+from stream_designs import FIELDS, parse_design
+
+"""
+File: design_server.py
+
+A small HTTP service for the Stand or Sink bearing check, so other programs
+can call it without going through the interactive prompts.
+
+    python design_server.py [--host 127.0.0.1] [--port 8765]
+
+POST /evaluate with a JSON design, or a list of designs, using the same
+fields and units (mm) as stream_designs.py:
+    {"soil_type": "SC", "foundation_depth": 1000, "foundation_width": 1500,
+     "number_of_floors": 2, "building_area": 100, "foundation_type": "I",
+     "num_footings": 4}
+and get back the design with "soil_name", "q_applied", "q_ult" and "safe"
+added, or a list of them. Designs that fail validation come back with an
+"error" field instead; a single invalid design also gets status 400.
+GET /health answers {"status": "ok"} and GET /stats gives the batching
+counters.
+
+Designs from requests that arrive together are not evaluated one by one:
+the DesignBatcher waits up to max_delay (1 ms by default) for more to come
+in and evaluates up to max_batch of them in one vectorized pass with the
+median soil properties and bearing factors from the soil registry. The
+results are the same as final_project.evaluate_design gives.
+
+The server only speaks enough HTTP/1.1 for JSON clients: Content-Length
+bodies and keep-alive connections, no chunked requests. Requests with a
+body over MAX_BODY_SIZE, more than MAX_HEADERS header lines or a line over
+64 KiB are refused with a 4xx status. It is meant for localhost, there is
+no authentication. load_test.py measures its throughput and latency.
+"""
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 4096
+DEFAULT_MAX_DELAY = 0.001
+MAX_BODY_SIZE = 16 * 1024 * 1024
+# Header lines per request; each line, and the request line, is also limited by the StreamReader (64 KiB)
+MAX_HEADERS = 100
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 414: "URI Too Long",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    """
+    A request the server answers with an error status and {"error": message}.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def evaluate_batch(designs):
+    """
+    Vectorized `final_project.evaluate_design` over parsed designs.
+
+    Args:
+        designs: list of designs as returned by `stream_designs.parse_design`, depth and width in m
+
+    Returns:
+        a list of dicts with "soil_name", "q_applied", "q_ult" and "safe", one per design.
+    """
+    if not designs:
+        return []
+    registry = get_registry()
+    soils = list(registry)
+    soil_index = {soil.code: i for i, soil in enumerate(soils)}
+    # Per soil: median cohesion and unit weight and the bearing factors at the median friction angle
+    cohesion = np.array([soil.medians[0] for soil in soils])
+    unit_weight = np.array([soil.medians[2] for soil in soils])
+    Nc, Nq, Ng = np.array([soil.bearing_factors for soil in soils]).T
+
+    index = np.array([soil_index[design["soil_type"]] for design in designs])
+    depth = np.array([design["foundation_depth"] for design in designs])
+    width = np.array([design["foundation_width"] for design in designs])
+    num_footings = footings_for_type([design["foundation_type"] for design in designs],
+                                     [design["num_footings"] for design in designs])
+    q_applied = compute_applied_pressure_batch(width, [design["number_of_floors"] for design in designs],
+                                               [design["building_area"] for design in designs], num_footings)
+    gamma = unit_weight[index]
+    # Same order of operations as Soil.ultimate_capacity, so the numbers match exactly
+    q_ult = cohesion[index] * Nc[index] + gamma * depth * Nq[index] + 0.5 * gamma * width * Ng[index]
+
+    return [{"soil_name": soils[i].name, "q_applied": applied, "q_ult": ultimate, "safe": applied < ultimate}
+            for i, applied, ultimate in zip(index.tolist(), q_applied.tolist(), q_ult.tolist())]
+
+
+class DesignBatcher:
+    """
+    Collects designs from concurrent requests and evaluates them together with `evaluate_batch`.
+    """
+
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH, max_delay=DEFAULT_MAX_DELAY):
+        """
+        Args:
+            max_batch: most designs evaluated in one pass
+            max_delay: seconds to wait for more designs once the first one of a batch arrived
+        """
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending = []
+        self.pending_designs = 0
+        self.flush_handle = None
+        self.requests = 0
+        self.designs = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.evaluate_seconds = 0.0
+
+    async def evaluate(self, designs):
+        """
+        Returns the results for a list of parsed designs, once the batch they are in has been evaluated.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((designs, future))
+        self.pending_designs += len(designs)
+        self.requests += 1
+        if self.pending_designs >= self.max_batch:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.max_delay, self.flush)
+        return await future
+
+    def flush(self):
+        """
+        Evaluates everything pending, in passes of at most max_batch designs.
+        """
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        pending, self.pending, self.pending_designs = self.pending, [], 0
+        while pending:
+            # Take whole requests up to max_batch designs, but always at least one request
+            count = 0
+            size = 0
+            while count < len(pending) and (count == 0 or size + len(pending[count][0]) <= self.max_batch):
+                size += len(pending[count][0])
+                count += 1
+            batch, pending = pending[:count], pending[count:]
+            self.run(batch, size)
+
+    def run(self, batch, size):
+        start = time.perf_counter()
+        try:
+            results = evaluate_batch([design for designs, future in batch for design in designs])
+        except Exception as error:
+            for designs, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        self.evaluate_seconds += time.perf_counter() - start
+        self.batches += 1
+        self.designs += size
+        self.largest_batch = max(self.largest_batch, size)
+        offset = 0
+        for designs, future in batch:
+            if not future.done():
+                future.set_result(results[offset:offset + len(designs)])
+            offset += len(designs)
+
+    def stats(self):
+        """
+        Returns the request, design and batch counters as a dict.
+        """
+        return {
+            "requests": self.requests,
+            "designs": self.designs,
+            "batches": self.batches,
+            "mean_batch": self.designs / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "evaluate_seconds": self.evaluate_seconds,
+        }
+
+
+class DesignServer:
+    """
+    The HTTP front end: parses requests, validates designs and hands them to a `DesignBatcher`.
+    """
+
+    def __init__(self, batcher=None):
+        self.batcher = batcher or DesignBatcher()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts listening and returns the asyncio server. Pass port 0 to pick a free port.
+        """
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, payload = await self.route(method, path, body)
+                except HTTPError as error:
+                    status, payload = error.status, {"error": str(error)}
+                except Exception as error:
+                    # A bug, or a failed batch: answer this request and keep serving
+                    traceback.print_exc(file=sys.stderr)
+                    status, payload = 500, {"error": f"internal error: {error}"}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as error:
+            # The request itself could not be read, so the connection cannot be reused
+            write_response(writer, error.status, {"error": str(error)}, keep_alive=False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as error:
+            traceback.print_exc(file=sys.stderr)
+            write_response(writer, 500, {"error": f"internal error: {error}"}, keep_alive=False)
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        """
+        Returns the (status, JSON payload) answering a request.
+        """
+        path = path.split("?", 1)[0]
+        if path == "/evaluate":
+            if method != "POST":
+                raise HTTPError(405, "use POST for /evaluate")
+            return await self.evaluate(body)
+        if path in ("/health", "/stats"):
+            if method != "GET":
+                raise HTTPError(405, f"use GET for {path}")
+            return 200, {"status": "ok"} if path == "/health" else self.batcher.stats()
+        raise HTTPError(404, f"no such path {path}")
+
+    async def evaluate(self, body):
+        try:
+            payload = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as error:
+            raise HTTPError(400, f"invalid JSON: {error}")
+        single = isinstance(payload, dict)
+        records = [payload] if single else payload
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise HTTPError(400, "expected a design object or a list of design objects")
+
+        # Like stream_designs.evaluate_record: invalid designs get an error instead of failing the batch
+        results = [{field: record.get(field) for field in FIELDS} for record in records]
+        valid = []
+        designs = []
+        for result, record in zip(results, records):
+            try:
+                designs.append(parse_design(record))
+                valid.append(result)
+            except ValueError as error:
+                result["error"] = str(error)
+        if designs:
+            for result, evaluated in zip(valid, await self.batcher.evaluate(designs)):
+                result.update(evaluated)
+
+        if single:
+            return (400 if "error" in results[0] else 200), results[0]
+        return 200, results
+
+
+async def read_request(reader):
+    """
+    Reads one HTTP request.
+
+    Returns:
+        (method, path, headers, body) with lower-case header names, or None if the client closed the connection.
+
+    Raises:
+        HTTPError: if the request is malformed or too large, or has more than MAX_HEADERS header lines.
+    """
+    request_line = await read_line(reader, 414, "request line too long")
+    if not request_line:
+        return None
+    parts = request_line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise HTTPError(400, "malformed request line")
+    method, path, version = parts
+    headers = {}
+    for _ in range(MAX_HEADERS + 1):
+        line = await read_line(reader, 431, "header line too long")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(431, f"more than {MAX_HEADERS} header lines")
+    if version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive":
+        headers["connection"] = "close"
+
+    body = b""
+    if method in ("POST", "PUT"):
+        if "transfer-encoding" in headers:
+            raise HTTPError(411, "send the body with a Content-Length")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, f"body larger than {MAX_BODY_SIZE} bytes")
+        body = await reader.readexactly(length)
+    return method, path, headers, body
+
+
+async def read_line(reader, status, message):
+    # readline raises ValueError for a line longer than the reader's limit, that is the client's mistake
+    try:
+        return await reader.readline()
+    except ValueError:
+        raise HTTPError(status, message)
+
+
+def write_response(writer, status, payload, keep_alive=True):
+    try:
+        # NaN and Infinity are not JSON, clients could not read them
+        body = json.dumps(payload, allow_nan=False).encode("utf-8")
+    except ValueError:
+        status = 500
+        body = json.dumps({"error": "internal error: the result is not a finite number"}).encode("utf-8")
+    writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                 f"Content-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n"
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, max_batch=DEFAULT_MAX_BATCH, max_delay=DEFAULT_MAX_DELAY):
+    server = await DesignServer(DesignBatcher(max_batch, max_delay)).start(host, port)
+    address = server.sockets[0].getsockname()
+    # load_test.py reads the port from this line when it starts the server itself
+    print(f"Listening on http://{address[0]}:{address[1]}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP JSON service for the Stand or Sink bearing check")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help="most designs evaluated in one pass")
+    parser.add_argument("--max-delay", type=float, default=DEFAULT_MAX_DELAY,
+                        help="seconds to wait for more designs before evaluating a batch")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_delay))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
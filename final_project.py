@@ -1,8 +1,12 @@
-from graphics import Canvas
+import functools
 import math
 import time
 import random
 
+# graphics (tkinter), particles and numpy are only needed for drawing, so they are
+# imported inside the functions that draw. Importing this file for the calculation
+# functions then stays quick and never loads tkinter.
+
 # Constants for canvas size and assumed floor load
 CANVAS_WIDTH = 400
 CANVAS_HEIGHT = 400
@@ -10,16 +14,10 @@ CANVAS_HEIGHT = 400
 FLOOR_WEIGHT = 6
 
 """
-# Soil property data: [cohesion_min, cohesion_max, 
-phi_min, phi_max, unit_weight_min, unit_weight_max]
+Soil property data: [cohesion_min, cohesion_max, phi_min, phi_max,
+unit_weight_min, unit_weight_max], colours, particle styles and pros and cons
+live in soils.json and are looked up by soil code with soils.get_soil
 """
-LOOSE_SAND = [0, 0, 28, 32, 16, 18]
-MEDIUM_DENSE_SAND = [0, 0, 32, 36, 17, 19]
-DENSE_SAND = [0, 0, 36, 40, 18, 21]
-SOFT_CLAY = [15, 25, 0, 5, 14, 17]
-STIFF_CLAY = [40, 75, 0, 10, 17, 20]
-SILTY_SAND = [5, 15, 26, 34, 16, 19]
-GRAVEL = [0, 0, 36, 42, 19, 22]
 
 """
 Adjust to change cloud size
@@ -37,30 +35,22 @@ TREE_BOTTOM_Y = CANVAS_HEIGHT - 20
 # Controls how fast the clouds move in the sky
 DELAY = 0.1
 
-def main():
-    # Create canvas
-    canvas = Canvas(CANVAS_WIDTH, CANVAS_HEIGHT)
-    """
-    Create scene for building drawing by drawing a light blue rectangle
-    representing the sky and three white clouds
-    """
-    canvas.create_rectangle(0, 0, 400, 120, 'light blue') # Draws sky
-    
-    # Draws three white clouds
-    x_cloud_one = 20 # x-coordinate for first cloud
-    y_cloud_one = 70 # y-coordinate for first cloud
-    cloud_one = draw_cloud(canvas, x_cloud_one, y_cloud_one, "white")
+# Draw the soil as one off-screen image instead of one canvas item per particle
+RASTER_SOIL = False
 
-    x_cloud_two = 270 # x-coordinate for second cloud
-    y_cloud_two = 20 # y-coordinate for second cloud
-    cloud_two = draw_cloud(canvas, x_cloud_two, y_cloud_two, "white")
+# Show the stress bulb under the foundation as a heatmap over the soil (needs Pillow)
+SHOW_STRESS_BULB = False
 
-    x_cloud_three = 270 # x-coordinate for third cloud
-    y_cloud_three = 70 # y-coordinate for third cloud
-    cloud_three = draw_cloud(canvas, x_cloud_three, y_cloud_three, "white")
-    
+# Pixels per m when drawing the foundation
+FOUNDATION_SCALE = 30
 
+# Settlement animation: frames per settlement step and seconds per frame
+SETTLEMENT_FRAMES = 10
+SETTLEMENT_FRAME_BUDGET = 1 / 30
+# How many settlement steps to show when the foundation fails
+FAILURE_SETTLEMENT_STEPS = 5
 
+def main():
     print("Let's see if your dream home will stand strong or sink like the Titanic") 
     print()
     print()
@@ -73,8 +63,11 @@ def main():
     print()
     print("Great choice!")
 
+    # The window is only opened now that there is something to draw on it
+    canvas, cloud_one, cloud_two, cloud_three = create_scene()
+
     # Draw soil based on user input
-    soil_particles = draw_soil(canvas, soil_type)
+    soil_particles = draw_soil(canvas, soil_type, RASTER_SOIL)
     print()
     # Get pros and cons of selected soil type
     properties = pros_and_cons(soil_type)
@@ -94,9 +87,7 @@ def main():
 
 
     # Compute median values for selected soil type
-    cohesion = (soil_characteristics[0] + soil_characteristics[1])/2
-    friction_angle = (soil_characteristics[2] + soil_characteristics[3])/2
-    unit_weight = (soil_characteristics[4] + soil_characteristics[5])/2
+    cohesion, friction_angle, unit_weight = compute_median_properties(soil_characteristics)
     
     # Get building floor area and number of floors from user
     number_of_floors, building_area = get_building_details()
@@ -108,12 +99,13 @@ def main():
 
     # Compute building pressure based on foundation type
     if foundation_type == "R":
-        foundation_area = foundation_width ** 2
         num_footings = 1 # For raft foundation, we consider it as one footing
+
+        # Draw foundation
+        foundation = draw_foundation(canvas, foundation_type, foundation_width, foundation_depth, num_footings)
         
         # Calculate total load and pressure
-        total_load = FLOOR_WEIGHT * number_of_floors * building_area
-        q_applied = total_load / foundation_area
+        q_applied = compute_applied_pressure(foundation_width, number_of_floors, building_area, num_footings)
 
     elif foundation_type == "I":
         # For isolated footing, we need number of footings
@@ -133,11 +125,7 @@ def main():
         foundation = draw_foundation(canvas, foundation_type, foundation_width, foundation_depth, num_footings)
         
         # Calculate load per footing and pressure
-        foundation_area = num_footings * foundation_width ** 2
-        total_load = FLOOR_WEIGHT * number_of_floors * building_area
-        load_per_footing = total_load / num_footings
-        area_per_footing = foundation_width ** 2
-        q_applied = load_per_footing / area_per_footing
+        q_applied = compute_applied_pressure(foundation_width, number_of_floors, building_area, num_footings)
     print()
     print("Cool!")
     print()
@@ -196,8 +184,7 @@ def main():
 
     
     # Calculate ultimate bearing capacity based on soil properties
-    Nc, Nq, Ng = compute_bearing_factors(friction_angle)
-    q_ult = cohesion * Nc + unit_weight * foundation_depth * Nq + 0.5 * unit_weight * foundation_width * Ng
+    q_ult = compute_ultimate_capacity(cohesion, friction_angle, unit_weight, foundation_depth, foundation_width)
     
     
     # Check if building load is safe
@@ -210,25 +197,57 @@ def main():
         print("We'll now draw a simplified version of your building's foundation \nto show how its weight spreads into the soil")
         
         draw_building(canvas, number_of_floors)
+        if SHOW_STRESS_BULB:
+            draw_stress_bulb(canvas, foundation, q_applied, foundation_width)
 
         
-        # Animate soil particles multiple times to simulate natural movement and settling
-        
-        move_soil_particles(canvas, soil_particles, foundation, foundation_depth, foundation_width)
+        # Animate soil particles to simulate natural movement and settling
+        animate_settlement(canvas, soil_particles, foundation)
 
     else:
         print("Ooops your building is pulling a Titanic! \nFind a Geotechnical Engineer(me) ASAP! \nOr use a deeper foundation, different soil or modify your foundation type (Finding me is a better option though😁)")
        
         draw_building(canvas, number_of_floors)
+        if SHOW_STRESS_BULB:
+            draw_stress_bulb(canvas, foundation, q_applied, foundation_width)
         # Dramatic soil movement
-        move_soil_particles(canvas, soil_particles, foundation)
+        animate_settlement(canvas, soil_particles, foundation, FAILURE_SETTLEMENT_STEPS)
         # Show failure message
         show_failure_message(canvas)
 
+    # Clays keep settling for years after the building goes up
+    from soils import get_soil
+    if get_soil(soil_type).consolidation:
+        print_long_term_settlement(soil_type, q_applied, foundation_width)
+
     animate_clouds(canvas, cloud_one, cloud_two, cloud_three)
     canvas.wait_for_click()
     canvas.wait_for_click()
 
+def create_scene():
+    # Create canvas
+    from graphics import Canvas
+    canvas = Canvas(CANVAS_WIDTH, CANVAS_HEIGHT)
+    """
+    Create scene for building drawing by drawing a light blue rectangle
+    representing the sky and three white clouds
+    """
+    canvas.create_rectangle(0, 0, 400, 120, 'light blue') # Draws sky
+    
+    # Draws three white clouds
+    x_cloud_one = 20 # x-coordinate for first cloud
+    y_cloud_one = 70 # y-coordinate for first cloud
+    cloud_one = draw_cloud(canvas, x_cloud_one, y_cloud_one, "white")
+
+    x_cloud_two = 270 # x-coordinate for second cloud
+    y_cloud_two = 20 # y-coordinate for second cloud
+    cloud_two = draw_cloud(canvas, x_cloud_two, y_cloud_two, "white")
+
+    x_cloud_three = 270 # x-coordinate for third cloud
+    y_cloud_three = 70 # y-coordinate for third cloud
+    cloud_three = draw_cloud(canvas, x_cloud_three, y_cloud_three, "white")
+    return canvas, cloud_one, cloud_two, cloud_three
+
 def wait_for_enter(message="Press Enter to continue..."):
     if not hasattr(wait_for_enter, "shown"):
         input(message)
@@ -271,7 +290,17 @@ def draw_cloud(canvas, initial_x, initial_y,color):
 
 def animate_clouds(canvas, cloud_one, cloud_two, cloud_three):
     # move created clouds around the sky to create a more engaging environment
-    speed = DELAY
+    # The canvas frame scheduler calls cloud_frames once every DELAY seconds
+    canvas.add_frame_callback(cloud_frames(canvas, cloud_one, cloud_two, cloud_three).__next__)
+    canvas.run_frames(1 / DELAY)
+
+def cloud_frames(canvas, cloud_one, cloud_two, cloud_three):
+    # Moves the clouds one frame each time the generator is advanced
+    # Each cloud is grouped so its three ovals move with one call
+    group_one = canvas.create_group(cloud_one)
+    group_two = canvas.create_group(cloud_two)
+    group_three = canvas.create_group(cloud_three)
+
     # Track change in x and y direction
     x1_change = 1
     y1_change = -1
@@ -292,48 +321,38 @@ def animate_clouds(canvas, cloud_one, cloud_two, cloud_three):
             x1_change = -x1_change
             y1_change = -y1_change
 
-        for cloud_obj in cloud_one:
-            canvas.move(cloud_obj, x1_change, y1_change)
+        canvas.move_group(group_one, x1_change, y1_change)
 
         # Move second cloud downward and upward
         if canvas.get_top_y(cloud_two[2]) == 120:
             if canvas.get_left_x(cloud_two[0]) == 270:
-                for cloud_obj in cloud_two:
-                    canvas.move(cloud_obj, X2_change[0], -190)
+                canvas.move_group(group_two, X2_change[0], -190)
             else:
-                for cloud_obj in cloud_two:
-                    canvas.move(cloud_obj, X2_change[1], -190)
+                canvas.move_group(group_two, X2_change[1], -190)
         else:
-            for cloud_obj in cloud_two:
-                canvas.move(cloud_obj, 0, y2_change)
+            canvas.move_group(group_two, 0, y2_change)
 
         # Move third cloud sideways
         if canvas.get_left_x(cloud_three[0]) == 600:
-            for cloud_obj in cloud_three:
-                canvas.move(cloud_obj, -1200, 0)
+            canvas.move_group(group_three, -1200, 0)
         else:
-            for cloud_obj in cloud_three:
-                canvas.move(cloud_obj, x3_change, 0)
-        time.sleep(speed)
+            canvas.move_group(group_three, x3_change, 0)
+        yield
 
 # Gives user soil types and prompts user to choose one
 def choose_soil_type():
-    # Let user choose soil type   
-    print("What soil type would you prefer to build on?"
-    "\n1.Loose Sand (LS)"
-    "\n2. Medium Dense Sand (MDS)"
-    "\n3. Dense Sand (DS)"
-    "\n4. Soft Clay (SC)"
-    "\n5. Stiff Clay (SIC)"
-    "\n6. Silty Sand (SS)"
-    "\n7. Gravel (G)"
-    )
+    # Let user choose soil type, the list comes from soils.json
+    from soils import get_registry
+    soils = get_registry()
+    print("What soil type would you prefer to build on?")
+    for number, soil in enumerate(soils, 1):
+        print(f"{number}. {soil.name} ({soil.code})")
     soil_type = input("Input soil type initial here: ").upper()
     print()
 
     # Ensure user chooses valid soil type
-    while soil_type not in ["LS", "MDS", "DS", "SC", "SIC", "SS", "G"]:
-        soil_type = input("Kindly input valid soil type (LS, MDS, DS, SC, SIC, SS, G): ").upper()
+    while soil_type not in soils:
+        soil_type = input(f"Kindly input valid soil type ({', '.join(soils.codes())}): ").upper()
         print()
 
     return soil_type
@@ -342,313 +361,224 @@ def choose_soil_type():
 Takes canvas and soil type choosen as inputes
 Based on soil type choosen, it draws a rectangle with a unique color
 and objects representing soil particles
+soil_type can also be a profiles.SoilProfile, then each layer gets its own
+band, one below the other at FOUNDATION_SCALE like the foundation
+Returns the particles as a ParticleStore
+With raster=True the soil and all its particles are painted into
+one off-screen image that is shown as a single canvas item
 """
-def draw_soil(canvas, soil_type):
-    particle_size = 1
-    initial_x = 0
-    initial_y = 3 * CANVAS_HEIGHT/4
-
-    # Map soil types to colors
-    color_map = {
-    "LS": "sandybrown",
-    "MDS": "peru",
-    "DS": "saddlebrown",
-    "SC": "tan",
-    "SIC": "burlywood",
-    "SS": "wheat",
-    "G": "gray"
-    }
-    color = color_map.get(soil_type, "gray") # Default to gray if not found
-    soil_particle = []
-    
-    # Draw soil
-    soil = canvas.create_rectangle(0, 3 * CANVAS_HEIGHT/4,
-                                    CANVAS_WIDTH,
-                                    CANVAS_HEIGHT, color)
-    
-    if soil_type == "LS":
-        # Draw smaller particles for loose sand
-        while (initial_y + particle_size) <= CANVAS_HEIGHT:
-            while (initial_x + particle_size) <= CANVAS_WIDTH:
-
-                particle_id = canvas.create_oval(initial_x,
-                                        initial_y,
-                                        initial_x + particle_size,
-                                        initial_y + particle_size,
-                                        "brown")
-                soil_particle.append((particle_id, initial_x, initial_y))
-                spacing = random.randint(1,25)
-                # Update initial_x to begin at specified point on right 
-                initial_x += (particle_size + spacing)
-
-            spacing = 1
-            # Update initial_y to begin below
-            initial_y += (particle_size + spacing)
-            initial_x = 0
-    
-    
-    elif soil_type == "MDS":
-        # Draw medium sized particles for medium dense sand
-        while (initial_y + particle_size) <= CANVAS_HEIGHT:
-            while (initial_x + particle_size) <= CANVAS_WIDTH:
-
-                particle_id = canvas.create_oval(initial_x,
-                                        initial_y,
-                                        initial_x + particle_size,
-                                        initial_y + particle_size,
-                                        "black")
-                soil_particle.append((particle_id, initial_x, initial_y))
-                spacing = random.randint(10, 25)
-                # Update initial_x to begin at specified point on right 
-                initial_x += (particle_size + spacing)
-
-            spacing = 5
-            # Update initial_y to begin below
-            initial_y += (particle_size + spacing)
-            initial_x = 0
-    
-    elif soil_type == "DS":
-        # Draw larger particles for dense sand
-        while (initial_y + particle_size) <= CANVAS_HEIGHT:
-            while (initial_x + particle_size) <= CANVAS_WIDTH:
-
-                particle_id = canvas.create_oval(initial_x,
-                                        initial_y,
-                                        initial_x + particle_size,
-                                        initial_y + particle_size,
-                                        "brown")
-
-                soil_particle.append((particle_id, initial_x, initial_y))
-                spacing = 5
-                # Update initial_x to begin at specified point on right 
-                initial_x += (particle_size + spacing)
-
-            spacing = 5
-            # Update initial_y to begin below
-            initial_y += (particle_size + spacing)
-            initial_x = 0
+def draw_soil(canvas, soil_type, raster=False):
+    from particles import ParticleStore
+    from soils import get_soil
+    if isinstance(soil_type, str):
+        bands = [(soil_type, 3 * CANVAS_HEIGHT/4, CANVAS_HEIGHT)]
+    else:
+        bands = soil_type.bands(3 * CANVAS_HEIGHT/4, CANVAS_HEIGHT, FOUNDATION_SCALE)
+    # Each soil type has a unique color
+    colors = [(top_y, bottom_y, get_soil(code).color) for code, top_y, bottom_y in bands]
+    shapes = []
+    for code, top_y, bottom_y in bands:
+        shapes += soil_particle_shapes(code, top_y, bottom_y)
+
+    if raster:
+        from soil_raster import SoilRaster
+        return SoilRaster(canvas, colors[0][2], shapes, 0, 3 * CANVAS_HEIGHT/4, CANVAS_WIDTH, CANVAS_HEIGHT,
+                          colors[1:])
+
+    particle_ids = []
     
-    elif soil_type == "SC":
-        # Draw larger, flatter particles for clay
-        while (initial_y + particle_size) <= CANVAS_HEIGHT:
-            while (initial_x + particle_size) <= CANVAS_WIDTH:
-                particle_size_x = random.randint(3, 10) # Make particles wider
-                particle_size_y = 1
-
-                particle_id = canvas.create_oval(initial_x,
-                                        initial_y,
-                                        initial_x + particle_size_x,
-                                        initial_y + particle_size_y,
-                                        'brown')
-                soil_particle.append((particle_id, initial_x, initial_y))
-                spacing = random.randint(1, 20) # Random spacing for variability
-                # Update initial_x to begin at specified point on right 
-                initial_x += (particle_size + spacing)
-
-            spacing = 15
-            # Update initial_y to begin below
-            initial_y += (particle_size + spacing)
-            initial_x = 0
-   
-    elif soil_type == "SIC":
-        # Draw rectangular particles for stiff clay
-        while (initial_y + particle_size) <= CANVAS_HEIGHT:
-            while (initial_x + particle_size) <= CANVAS_WIDTH:
-                particle_size_x = 6 # Fixed width for rectangular particles
-                particle_size_y = 3 # Fixed height for rectangular particles
-
-                particle_id = canvas.create_rectangle(initial_x,
-                                        initial_y,
-                                        initial_x + particle_size_x,
-                                        initial_y + particle_size_y,
-                                        'gray')
-                soil_particle.append((particle_id, initial_x, initial_y))
-                spacing = random.randint(1, 10) # Random spacing for variability
-                # Update initial_x to begin at specified point on right 
-                initial_x += (particle_size + spacing)
-
-            spacing = random.randint(7, 10)
-            # Update initial_y to begin below
-            initial_y += (particle_size + spacing)
-            initial_x = random.randint(0, 5) # Randomize starting x for next row
-   
-    elif soil_type == "SS":
-        # Draw larger, flatter particles for silty sand
-        while (initial_y + particle_size) <= CANVAS_HEIGHT:
-            while (initial_x + particle_size) <= CANVAS_WIDTH:
-                particle_size_x = random.randint(1, 7) # Make particles wider
-                particle_size_y = 1
-
-                particle_id = canvas.create_oval(initial_x,
-                                        initial_y,
-                                        initial_x + particle_size_x,
-                                        initial_y + particle_size_y,
-                                        'black')
-                
-                soil_particle.append((particle_id, initial_x, initial_y))
-                spacing = random.randint(1, 20) # Random spacing for variability
-                # Update initial_x to begin at specified point on right 
-                initial_x += (particle_size + spacing)
-
-            spacing = 10
-            # Update initial_y to begin below
-            initial_y += (particle_size + spacing)
-            initial_x = random.randint(0, 5) # Randomize starting x for next row
+    # Draw soil, one rectangle per layer
+    for top_y, bottom_y, color in colors:
+        canvas.create_rectangle(0, top_y, CANVAS_WIDTH, bottom_y, color)
     
-    else:
-        # Draw irregular polygonal particles for gravel
-        while (initial_y + particle_size) <= CANVAS_HEIGHT:
-            while (initial_x + particle_size) <= CANVAS_WIDTH:
-                particle_size_poly = random.randint(9,15) # Size of the polygon
-                polygon_top_left = initial_x + 3
-                polygon_top_right = initial_x + random.randint(7,10)
-                polygon_middle_right = initial_x + random.randint(11,15)
-                polygon_bottom_left = initial_x + random.randint(3,5)
-                polygon_bottom_right = initial_x + random.randint(7,10) 
-                particle_size_x = random.randint(7, 15) # Width of the particle
-                particle_size_y = random.randint(7, 15) # Height of the particle
-                
-                particle_id = canvas.create_polygon(polygon_top_left,
-                                                initial_y,
-                                                polygon_top_right,
-                                                initial_y + 2,
-                                                polygon_middle_right,
-                                                initial_y + (1/2 * particle_size_poly),
-                                                polygon_bottom_right,
-                                                initial_y + particle_size_poly,
-                                                polygon_bottom_left,
-                                                initial_y + particle_size_poly,
-                                                initial_x,
-                                                initial_y + (1/2 * particle_size_poly),
-                                                fill='gray', 
-                                                outline='black'
-                                                )
-                spacing = random.randint(0,3) # Random spacing for variability
-                soil_particle.append((particle_id, initial_x, initial_y))
-                # Update initial_x to begin at specified point on right 
-                initial_x = (polygon_middle_right + spacing) 
-            
-            # Update initial_y to begin below
-            initial_y += (10 + spacing)
-            initial_x = random.randint(0, 3) # Randomize starting x for next row
-    return soil_particle
-
-
-def move_soil_particles(canvas, soil_particles, foundation, foundation_depth, foundation_width):
-    base_y = 3 * CANVAS_HEIGHT / 4
-    updated_particles = []
-    for i, (particle_id, x, y) in enumerate(soil_particles):
-        # Get foundation coordinates
-        for foundation_part in foundation:
-            foundation_coords = canvas.coords(foundation_part)
-            foundation_left_x = foundation_coords[0]
-            foundation_top_y = foundation_coords[1]
-
-            # Check if particle is within foundation area
-            if (foundation_left_x <= x <= foundation_left_x + foundation_width * 30):
-                dx = random.choice([-4, 0, 4])
-                depth = y - (foundation_top_y + foundation_depth * 30) # Depth below foundation
-                dy = max(1, int(5 - depth / 20)) # Speed decreases with depth
-                # If within foundation area, move particle below foundation to simulate compaction
-                canvas.move(particle_id, x + dx, y + dy)
-                updated_particles.append((particle_id, x + dx, y+ dy))
-            else:
-                updated_particles.append((particle_id, x, y))
+    for kind, x, y, points, fill, outline in shapes:
+        # Points are relative to the particle's top left corner
+        absolute = [value + (x if i % 2 == 0 else y) for i, value in enumerate(points)]
+        if kind == "oval":
+            particle_id = canvas.create_oval(*absolute, fill)
+        elif kind == "rectangle":
+            particle_id = canvas.create_rectangle(*absolute, fill)
+        else:
+            particle_id = canvas.create_polygon(*absolute, fill=fill, outline=outline)
+        particle_ids.append(particle_id)
+    return ParticleStore.from_shapes(shapes, particle_ids)
 
-    # Update the soil_particles list in place
-    soil_particles[:] = updated_particles
-    
+"""
+Works out the soil particles for a soil type without drawing them
+Returns a list of (kind, x, y, points, fill, outline) where kind is
+"oval", "rectangle" or "polygon", (x, y) is where the particle starts
+and points are its coordinates relative to (x, y)
+Particle rows start between top_y and bottom_y, by default the whole soil
+The soil's "particles" entry in soils.json picks the style and its settings
+"""
+def soil_particle_shapes(soil_type, top_y=3 * CANVAS_HEIGHT/4, bottom_y=CANVAS_HEIGHT):
+    from soils import get_soil
+    style = get_soil(soil_type).particles
+    return PARTICLE_STYLES[style["style"]](style, top_y, bottom_y)
+
+def pick(setting):
+    # A setting is either a number or a [low, high] range to pick a random whole number from
+    if isinstance(setting, list):
+        return random.randint(setting[0], setting[1])
+    return setting
+
+def grid_particles(style, top_y, bottom_y):
+    # Rows of particles across the soil, used for the sands and clays
+    # Sizes and spacings come from the style so each soil looks different
+    particle_size = 1
+    initial_x = 0
+    initial_y = top_y
+    shapes = []
+    while (initial_y + particle_size) <= bottom_y:
+        while (initial_x + particle_size) <= CANVAS_WIDTH:
+            particle_size_x = pick(style["width"])
+            particle_size_y = pick(style["height"])
+
+            shapes.append((style["kind"], initial_x, initial_y,
+                           (0, 0, particle_size_x, particle_size_y), style["fill"], style["outline"]))
+            spacing = pick(style["spacing"])
+            # Update initial_x to begin at specified point on right 
+            initial_x += (particle_size + spacing)
+
+        spacing = pick(style["row_spacing"])
+        # Update initial_y to begin below
+        initial_y += (particle_size + spacing)
+        initial_x = pick(style["row_start"]) # Starting x for next row
+    return shapes
+
+def gravel_particles(style, top_y, bottom_y):
+    # Draw irregular polygonal particles for gravel
+    particle_size = 1
+    initial_x = 0
+    initial_y = top_y
+    shapes = []
+    while (initial_y + particle_size) <= bottom_y:
+        while (initial_x + particle_size) <= CANVAS_WIDTH:
+            particle_size_poly = random.randint(9,15) # Size of the polygon
+            polygon_top_left = 3
+            polygon_top_right = random.randint(7,10)
+            polygon_middle_right = random.randint(11,15)
+            polygon_bottom_left = random.randint(3,5)
+            polygon_bottom_right = random.randint(7,10) 
+            particle_size_x = random.randint(7, 15) # Width of the particle
+            particle_size_y = random.randint(7, 15) # Height of the particle
+            
+            shapes.append(("polygon", initial_x, initial_y,
+                           (polygon_top_left, 0,
+                            polygon_top_right, 2,
+                            polygon_middle_right, 1/2 * particle_size_poly,
+                            polygon_bottom_right, particle_size_poly,
+                            polygon_bottom_left, particle_size_poly,
+                            0, 1/2 * particle_size_poly),
+                           style["fill"], style["outline"]))
+            spacing = random.randint(0,3) # Random spacing for variability
+            # Update initial_x to begin at specified point on right 
+            initial_x = (initial_x + polygon_middle_right + spacing) 
+        
+        # Update initial_y to begin below
+        initial_y += (10 + spacing)
+        initial_x = random.randint(0, 3) # Randomize starting x for next row
+    return shapes
+
+# Particle styles that soils.json can ask for
+PARTICLE_STYLES = {
+    "grid": grid_particles,
+    "gravel": gravel_particles,
+}
+
+
+def move_soil_particles(canvas, soil_particles, foundation, foundation_depth=None, foundation_width=None):
+    # Moves the particles under the foundation one settlement step in a single frame
+    # soil_particles is the ParticleStore returned by draw_soil
+    # The footing size now comes from the footings drawn on the canvas,
+    # foundation_depth and foundation_width are only kept for older callers
+    # Read the footing extents once instead of once per particle
+    from particles import FootingIndex
+    footings = FootingIndex.from_canvas(canvas, foundation)
+    under, dx, dy = settlement_displacement(soil_particles, footings)
+    shift_particles(canvas, soil_particles, under, dx, dy)
+
+def settlement_displacement(soil_particles, footings):
+    # Returns the particles under the footings and how far one settlement step moves them
+    import numpy as np
+    if len(footings) == 0:
+        return np.array([], dtype=int), np.array([], dtype=int), np.array([], dtype=int)
+
+    # Find the particles under any footing, some may be under more than one
+    covering = footings.count_covering(soil_particles.x)
+    under = np.flatnonzero(covering)
+    covering = covering[under]
+
+    # Each footing above a particle nudges it sideways by -4, 0 or 4
+    nudges = np.random.choice([-4, 0, 4], (len(under), covering.max(initial=1)))
+    nudges[np.arange(nudges.shape[1]) >= covering[:, None]] = 0
+    dx = nudges.sum(axis=1)
+    depth = soil_particles.y[under] - footings.bottom_at(soil_particles.x[under]) # Depth below foundation
+    dy = covering * np.maximum(1, (5 - depth / 20).astype(int)) # Speed decreases with depth
+    return under, dx, dy
+
+def shift_particles(canvas, soil_particles, indices, dx, dy):
+    # Moves the chosen particles by dx, dy in the store and on the canvas
+    from particles import ParticleStore
+    soil_particles.move(dx, dy, indices)
+    # canvas.move takes the change in position, skip particles that stay put
+    moving = (dx != 0) | (dy != 0)
+    for particle_id, particle_dx, particle_dy in zip(soil_particles.ids[indices][moving].tolist(),
+                                                     dx[moving].tolist(), dy[moving].tolist()):
+        if particle_id != ParticleStore.NO_ID:
+            canvas.move(particle_id, particle_dx, particle_dy)
+
+    # Raster soil is one image, repaint it with the new positions
+    if hasattr(soil_particles, "redraw"):
+        soil_particles.redraw()
+
+def animate_settlement(canvas, soil_particles, foundation, steps=1,
+                       frames_per_step=SETTLEMENT_FRAMES, frame_budget=SETTLEMENT_FRAME_BUDGET):
+    """
+    Animates the soil settling under the foundation over several frames
+    Each settlement step is worked out once and then shown in whole pixel
+    moves spread over frames_per_step frames, so the particles glide instead of jumping
+    Only arrays the size of the particle set are kept, so memory does not grow
+    with the number of steps, frames or footings
+    frame_budget is the time in seconds each frame is given, frames are run by
+    the canvas frame scheduler which skips drawing frames that fall behind
+    """
+    canvas.add_frame_callback(settlement_frames(canvas, soil_particles, foundation,
+                                                steps, frames_per_step).__next__)
+    canvas.run_frames(1 / frame_budget)
+
+def settlement_frames(canvas, soil_particles, foundation, steps, frames_per_step):
+    # Moves the particles one frame of the settlement each time the generator is advanced
+    from particles import FootingIndex
+    footings = FootingIndex.from_canvas(canvas, foundation)
+    for step in range(steps):
+        under, dx, dy = settlement_displacement(soil_particles, footings)
+        for frame in range(1, frames_per_step + 1):
+            # Whole pixel share of the step for this frame, the shares add up to dx and dy exactly
+            frame_dx = dx * frame // frames_per_step - dx * (frame - 1) // frames_per_step
+            frame_dy = dy * frame // frames_per_step - dy * (frame - 1) // frames_per_step
+            shift_particles(canvas, soil_particles, under, frame_dx, frame_dy)
+            yield
 
 # Gives user pros and cons of the soil type they chose
 def pros_and_cons(soil_type_choosen):
-    if soil_type_choosen == "LS":
-        pros_and_cons = """
-        Loose sand drains water quickly which reduces pore water pressure
-        Don't feel pressured if you don't know what that is (lame pun intended)
-        It simply means your building will have less forces working against it
-        However be careful, LS has low strength and is prone to settlement
-        """
-    elif soil_type_choosen == "MDS":
-        pros_and_cons = """
-        MDS, much like its name, has medium strength and drainage
-        This is good since sand is known for its low strength
-        MDS also has a better load distribution than LS
-        However, it is prone to settlement which can cause your beautiful home to sink
-        """
-    elif soil_type_choosen == "DS":
-        pros_and_cons = """   
-        Good choice, it has high shear strength, excellent bearing capacity and low compressibility
-        But hey, I hope you aren't planning to live in an earthquake prone zone though
-        Sesmic activity can cause the soil to flow like water and destroy your property
-        The low compressibility also means you can't compact it well to rule out settlement
-        """
-    elif soil_type_choosen == "SC":
-        pros_and_cons = """ 
-        The soft nature of the soil makes it easy to evacuate 
-        But be very careful, SC has very low strength 
-        and keeps settling over long periods of time 
-        Unlike the Titanic, you will have no warning that your building is sinking
-        as it can take years
-        """
-    elif soil_type_choosen == "SIC":
-        pros_and_cons = """
-        Compared to SC, it has a higher bearing strength
-        and reduced settlement risk
-        But watch out, it can develop cracks when dry, 
-        leading to water seepage and volume changes.
-        """
-    elif soil_type_choosen == "SS":
-        pros_and_cons = """
-        SS has moderate bearing capacity if compacted well
-        The cons are, it retains water
-        so I wouldn't recommend it if you live at a snowy place
-        as it becomes prone to frost heave and reduced strength when saturated.
-        """
-    else:
-        pros_and_cons = """
-        Like the Bible said, is is wise to build on a rock 
-        (or several tiny rocks as in the case of gravels)
-        G has a high bearing capacity, excellent drainage and rarely compresses
-        On the other hand it is hard to compact uniformly 
-        and may allow water movement under foundations
-        It is also hard and expensive to excavate but that's not a problem for you
-        We both know Jeff Bezos has got nothing on you 😉
-        """
-    return pros_and_cons
+    from soils import get_soil
+    lines = get_soil(soil_type_choosen).pros_and_cons
+    return "\n" + "".join(f"        {line}\n" for line in lines) + "        "
 
 def sort_type(soil_type):
     # Sort soil properties
-    if soil_type == "LS":
-        soil_characteristics = LOOSE_SAND
-        type_name = "Loose Sand"
-    elif soil_type == "MDS":
-        soil_characteristics = MEDIUM_DENSE_SAND 
-        type_name = "Medium Dense Sand"
-    elif soil_type == "DS":
-        soil_characteristics = DENSE_SAND
-        type_name = "Dense sand"
-    elif soil_type == "SC":
-        soil_characteristics = SOFT_CLAY
-        type_name = "Soft Clay"
-    elif soil_type == "SIC":
-        soil_characteristics = STIFF_CLAY
-        type_name = "Stiff Clay"
-    elif soil_type == "SS":
-        soil_characteristics = SILTY_SAND
-        type_name = "Silty Sand"
-    else:
-        soil_characteristics = GRAVEL
-        type_name = "Gravel"
-
-    return type_name, soil_characteristics  
+    from soils import get_soil
+    soil = get_soil(soil_type)
+    return soil.name, soil.characteristics  
 
 def print_variable_guide(soil_characteristics, type_name, properties):
     print(f"You have selected: {type_name}\n{properties}")
 
     print(f"Typical property values for {type_name} are: ")
 
-    if type_name in ["Loose Sand", "Gravel", "Medium Dense Sand", "Dense Sand"]:
-        print("Cohesion (c): 0")
+    if soil_characteristics[0] == soil_characteristics[1]:
+        print(f"Cohesion (c): {soil_characteristics[0]}")
     else:
         print(f"Cohesion (c): {soil_characteristics[0]} - {soil_characteristics[1]}")
     print(f"Friction angle (φ): {soil_characteristics[2]} - {soil_characteristics[3]}"
@@ -760,9 +690,10 @@ def get_foundation_type(soil_type):
     print("Isolated Footings(I) on the other hand consists of several columns \nholding up the building, each with it's own footing")
     wait_for_enter()
     
-    # Runs if soil is prone to settlement, that is is SC, SS or LS
+    # Runs if soil is prone to settlement (SC, SS and LS in soils.json)
     # Advices user to choose raft foundation 
-    if soil_type in ["SC", "SS", "LS"]:
+    from soils import get_soil
+    if get_soil(soil_type).settlement_prone:
         print()
         print("💡 Tip:")
         print("The soil you selected is prone to settlement.")
@@ -777,8 +708,8 @@ def get_foundation_type(soil_type):
     return foundation_type
 
 def draw_foundation(canvas, foundation_type, foundation_width, foundation_depth, num_footings=1, color="grey"):
-    # Visual scale: 1m = 10 pixels (adjust as needed)
-    scale = 30
+    # Visual scale: 1m = FOUNDATION_SCALE pixels (adjust as needed)
+    scale = FOUNDATION_SCALE
     foundation_top = 3 * CANVAS_HEIGHT / 4
     foundation_bottom = foundation_top + foundation_depth * scale
     foundation = []
@@ -805,9 +736,27 @@ def draw_foundation(canvas, foundation_type, foundation_width, foundation_depth,
             foundation.append(canvas.create_rectangle(left_x, foundation_top, right_x, foundation_bottom, color))
     return foundation
 
+"""
+Colours the soil by how much of the foundation pressure reaches it
+and outlines where it drops to 50%, 20% and 10%
+q_applied is the pressure over foundation_width² like compute_applied_pressure,
+a raft is drawn wider than that, so its pressure is spread over the drawn
+width to keep the same load on each footing
+Returns the StressBulb, call its update method if the load changes
+"""
+def draw_stress_bulb(canvas, foundation, q_applied, foundation_width):
+    from stress import StressBulb
+    left_x, _, right_x, _ = canvas.coords(foundation[0])[:4]
+    drawn_width = (right_x - left_x) / FOUNDATION_SCALE
+    q_drawn = q_applied * (foundation_width / drawn_width) ** 2
+    return StressBulb(canvas, foundation, q_drawn, FOUNDATION_SCALE,
+                      0, 3 * CANVAS_HEIGHT/4, CANVAS_WIDTH, CANVAS_HEIGHT)
+
 def draw_building(canvas,number_of_floors):
     # Draw building above foundation
     # Each floor is represented as a blue rectangle
+    # Returns a canvas group holding the whole building
+    building = canvas.create_group()
     left_x = CANVAS_WIDTH/2 - 50
     # Start the building just above the soil/foundation
     top_y = 3 * CANVAS_HEIGHT / 4 - number_of_floors * 70
@@ -816,7 +765,7 @@ def draw_building(canvas,number_of_floors):
     
     # Create building floors
     for i in range(number_of_floors): 
-        canvas.create_rectangle(left_x, top_y, right_x, top_y + 70, "blue")
+        canvas.add_to_group(building, canvas.create_rectangle(left_x, top_y, right_x, top_y + 70, "blue"))
         top_y += 70 # Move up for the next floor
 
 
@@ -826,12 +775,53 @@ def draw_building(canvas,number_of_floors):
     right_x = CANVAS_WIDTH/2 + 40
     bottom_y = CANVAS_HEIGHT - 140
     for i in range(number_of_floors):
-        canvas.create_rectangle(left_x,top_y,right_x,bottom_y,"grey")
+        canvas.add_to_group(building, canvas.create_rectangle(left_x,top_y,right_x,bottom_y,"grey"))
         top_y -= 70
         bottom_y -= 70
+    return building
 
      
+"""
+Bearing factors are read from a table on a 0.01° grid between 5° and 50°
+and linearly interpolated. The relative interpolation error is below
+1.5e-6 for Nc, Nq and Ng over that range (the error grows like the square
+of the step). Angles outside the table, including the φ = 0 clays, use the
+exact formula. Repeated angles are answered from a memo cache.
+"""
+BEARING_TABLE_MIN_ANGLE = 5
+BEARING_TABLE_MAX_ANGLE = 50
+BEARING_TABLE_STEP = 0.01
+BEARING_CACHE_SIZE = 4096
+
+_bearing_table = None
+
+@functools.lru_cache(maxsize=BEARING_CACHE_SIZE)
 def compute_bearing_factors(friction_angle):
+    if BEARING_TABLE_MIN_ANGLE <= friction_angle <= BEARING_TABLE_MAX_ANGLE:
+        return interpolate_bearing_factors(friction_angle)
+    return compute_bearing_factors_exact(friction_angle)
+
+def build_bearing_table():
+    # Built on the first lookup, then shared by every later call
+    global _bearing_table
+    if _bearing_table is None:
+        num_steps = round((BEARING_TABLE_MAX_ANGLE - BEARING_TABLE_MIN_ANGLE) / BEARING_TABLE_STEP)
+        _bearing_table = [compute_bearing_factors_exact(BEARING_TABLE_MIN_ANGLE + i * BEARING_TABLE_STEP)
+                          for i in range(num_steps + 1)]
+    return _bearing_table
+
+def interpolate_bearing_factors(friction_angle):
+    table = build_bearing_table()
+    position = (friction_angle - BEARING_TABLE_MIN_ANGLE) / BEARING_TABLE_STEP
+    index = min(int(position), len(table) - 2)
+    t = position - index
+    lower = table[index]
+    upper = table[index + 1]
+    return (lower[0] + t * (upper[0] - lower[0]),
+            lower[1] + t * (upper[1] - lower[1]),
+            lower[2] + t * (upper[2] - lower[2]))
+
+def compute_bearing_factors_exact(friction_angle):
     phi = math.radians(friction_angle)
     Nq = math.exp(2*math.pi*(0.75 - friction_angle/360)*math.tan(phi)) \
          / (2 * math.cos(math.radians(45 + friction_angle/2))**2)
@@ -840,6 +830,63 @@ def compute_bearing_factors(friction_angle):
     Ng = 0.5 * math.tan(phi) * (Kp / math.cos(phi)**2 - 1)
     return Nc, Nq, Ng
 
+def compute_median_properties(soil_characteristics):
+    # Median cohesion, friction angle and unit weight of a soil property range
+    cohesion = (soil_characteristics[0] + soil_characteristics[1])/2
+    friction_angle = (soil_characteristics[2] + soil_characteristics[3])/2
+    unit_weight = (soil_characteristics[4] + soil_characteristics[5])/2
+    return cohesion, friction_angle, unit_weight
+
+def compute_applied_pressure(foundation_width, number_of_floors, building_area, num_footings=1):
+    """
+    Pressure (kN/m²) under one footing. A raft is treated as a single footing,
+    isolated footings share the total building load equally
+    """
+    total_load = FLOOR_WEIGHT * number_of_floors * building_area
+    load_per_footing = total_load / num_footings
+    area_per_footing = foundation_width ** 2
+    return load_per_footing / area_per_footing
+
+def compute_ultimate_capacity(cohesion, friction_angle, unit_weight, foundation_depth, foundation_width):
+    # q_ult = c * Nc + gamma * D * Nq + 0.5 * gamma * B * Ng
+    Nc, Nq, Ng = compute_bearing_factors(friction_angle)
+    return cohesion * Nc + unit_weight * foundation_depth * Nq + 0.5 * unit_weight * foundation_width * Ng
+
+def evaluate_design(soil_type, foundation_depth, foundation_width, number_of_floors,
+                    building_area, foundation_type, num_footings=1):
+    """
+    Runs the same soil lookup, pressure and bearing checks as main without
+    prompting or drawing. Depth and width are in m.
+    Returns a dict with the soil name, q_applied, q_ult and whether the building is safe
+    """
+    # The soil's medians and bearing factors were worked out when it was loaded
+    from soils import get_soil
+    soil = get_soil(soil_type)
+    if foundation_type == "R":
+        num_footings = 1 # For raft foundation, we consider it as one footing
+    q_applied = compute_applied_pressure(foundation_width, number_of_floors, building_area, num_footings)
+    q_ult = soil.ultimate_capacity(foundation_depth, foundation_width)
+    return {
+        "soil_name": soil.name,
+        "q_applied": q_applied,
+        "q_ult": q_ult,
+        "safe": q_applied < q_ult
+    }
+
+def print_long_term_settlement(soil_type, q_applied, foundation_width):
+    # Consolidation settlement of the clay under one footing, see consolidation.py
+    from consolidation import settlement_curve, time_to_degree
+    curve = settlement_curve(soil_type, q_applied, foundation_width)
+    final_settlement = float(curve["final_settlement"])
+    years_to_90 = float(time_to_degree(curve, 0.9))
+    print()
+    print(f"Over time the clay will squeeze out water and your building will settle about {final_settlement:.0f} mm")
+    if not math.isnan(years_to_90):
+        print(f"90% of that happens in the first {years_to_90:.1f} years")
+    else:
+        print(f"and it will still be settling after {curve['time'][-1]:.0f} years")
+    print()
+
 def show_failure_message(canvas):
     # Centered horizontally and vertically, with red color
     canvas.create_text(
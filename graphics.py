@@ -1,6 +1,10 @@
+import collections
+import json
+import os
 import random
+import sys
+import time
 import tkinter
-import tkinter.font
 
 """
 File: graphics.py
@@ -17,6 +21,304 @@ TODO notes:
 """
 
 
+class FrameScheduler:
+    """
+    Fixed-timestep frame clock shared by `Canvas` and `HeadlessCanvas`.  Registered callbacks are called once per
+    frame.  Frame times are measured on a monotonic clock; when a frame runs late, the missed frames are caught up by
+    calling the callbacks again without drawing in between (at most `FrameScheduler.MAX_CATCH_UP` times), so
+    animations keep their speed under load and only the drawing is skipped.
+
+    A callback is removed when it returns False or raises StopIteration, so the `__next__` of a generator that
+    yields once per frame can be registered directly.
+    """
+
+    MAX_CATCH_UP = 5
+    """Most frame updates run in one go when catching up; frames beyond this are dropped."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.callbacks = []
+        self.period = 1 / Canvas.DEFAULT_FPS
+        self.next_frame_time = 0
+        self.running = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.frames = 0
+        self.updates = 0
+        self.dropped_frames = 0
+        self.total_frame_time = 0.0
+        self.max_frame_time = 0.0
+        self.started_at = self.clock()
+
+    def add(self, callback):
+        self.callbacks.append(callback)
+
+    def remove(self, callback):
+        if callback in self.callbacks:
+            self.callbacks.remove(callback)
+
+    def start(self, fps):
+        self.period = 1 / fps
+        self.next_frame_time = self.clock()
+        self.running = True
+        self.reset_stats()
+
+    def tick(self):
+        """
+        Runs the frame (or frames) that are due.
+
+        Returns:
+            the number of seconds until the next frame is due, or None once no callbacks are left.
+        """
+        frame_start = self.clock()
+        due = 1
+        if frame_start > self.next_frame_time:
+            due += int((frame_start - self.next_frame_time) / self.period)
+        for _ in range(min(due, self.MAX_CATCH_UP)):
+            for callback in list(self.callbacks):
+                try:
+                    keep = callback()
+                except StopIteration:
+                    keep = False
+                if keep is False:
+                    self.remove(callback)
+            self.updates += 1
+
+        frame_end = self.clock()
+        frame_time = frame_end - frame_start
+        self.frames += 1
+        self.dropped_frames += due - 1
+        self.total_frame_time += frame_time
+        self.max_frame_time = max(self.max_frame_time, frame_time)
+        self.next_frame_time += due * self.period
+
+        if not self.callbacks:
+            self.running = False
+            return None
+        return max(0.0, self.next_frame_time - frame_end)
+
+    def stats(self):
+        """
+        Returns a dict with the number of drawn "frames", callback "updates", "dropped_frames" (frames that were
+        due but never drawn), the "mean_frame_time" and "max_frame_time" in seconds spent in callbacks per frame,
+        and the achieved "fps".
+        """
+        elapsed = self.clock() - self.started_at
+        return {
+            "frames": self.frames,
+            "updates": self.updates,
+            "dropped_frames": self.dropped_frames,
+            "mean_frame_time": self.total_frame_time / self.frames if self.frames else 0.0,
+            "max_frame_time": self.max_frame_time,
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+class ImageCache:
+    """
+    Bounded least-recently-used cache of decoded image files, shared by all images a `Canvas` loads.  Entries are
+    keyed by (absolute path, size, modification time), so every item showing the same file at the same size shares
+    one PhotoImage, and a file that changes on disk is loaded again instead of served stale.
+
+    The cache only holds its own reference to each image.  Images still shown on the canvas are also held by the
+    canvas until their item is deleted, so evicting an entry never blanks an item, and an image is freed once it is
+    neither cached nor shown.
+    """
+
+    DEFAULT_MAX_SIZE = 64
+    """The default number of decoded images to keep."""
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self.images = collections.OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, file_path, size=None):
+        """
+        Returns the cache key for an image file shown at the given (width, height), or at its own size if None.
+        """
+        return os.path.abspath(file_path), size, os.stat(file_path).st_mtime_ns
+
+    def get(self, key, load):
+        """
+        Returns the cached image for key, calling load() to decode it on a miss.
+        """
+        if key in self.images:
+            self.hits += 1
+            self.images.move_to_end(key)
+            return self.images[key]
+        self.misses += 1
+        image = load()
+        if self.max_size > 0:
+            self.images[key] = image
+            self.shrink()
+        return image
+
+    def shrink(self):
+        while len(self.images) > self.max_size:
+            self.images.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.images.clear()
+
+    def stats(self):
+        """
+        Returns a dict with the number of cache "hits", "misses" and "evictions", and the current "size" and
+        "max_size" in images.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.images),
+            "max_size": self.max_size,
+        }
+
+
+class TclTracer:
+    """
+    Records every Tcl call a `Canvas` makes while tracing is on.  It stands in for the canvas's Tcl interpreter
+    (the `tk` attribute every tkinter method calls through), times each call and passes everything else straight to
+    the real interpreter.  When tracing is off the real interpreter is put back, so tracing costs nothing.
+
+    Calls are counted and timed per operation, named after the Tcl command (e.g. "create oval", "move", "coords",
+    "update"), per calling function outside graphics.py and tkinter (e.g. "final_project.draw_soil"), and per frame
+    of the frame scheduler.  Times are exclusive: a call that runs other Tcl calls, like "update" running frame
+    callbacks, is only charged for its own time.  Time spent waiting for events in "tkwait" is reported but not
+    counted in the totals.
+    """
+
+    MAX_FRAMES = 10000
+    """Most per-frame summaries kept; older ones are dropped."""
+
+    IDLE_OPERATIONS = ("tkwait", "vwait")
+
+    def __init__(self, tk, widget_path, clock=time.perf_counter):
+        """
+        Args:
+            tk: the real Tcl interpreter
+            widget_path: the Tcl name of the canvas, so calls on it are named by their subcommand
+        """
+        self._tk = tk
+        self._widget_path = widget_path
+        self._clock = clock
+        self._started_at = clock()
+        self._operations = {}
+        self._callers = {}
+        self._frame_operations = {}
+        self._frames = collections.deque(maxlen=self.MAX_FRAMES)
+        self._frame_count = 0
+        self._caller_names = {}
+        self._child_time = [0.0]
+        self._skip_prefixes = (os.path.abspath(__file__), os.path.dirname(os.path.abspath(tkinter.__file__)))
+
+    def __getattr__(self, name):
+        return getattr(self._tk, name)
+
+    def call(self, *args):
+        self._child_time.append(0.0)
+        start = self._clock()
+        try:
+            return self._tk.call(*args)
+        finally:
+            elapsed = self._clock() - start
+            children = self._child_time.pop()
+            self._child_time[-1] += elapsed
+            self.__record(self.__operation(args), self.__caller(), elapsed - children)
+
+    def __operation(self, args):
+        # tkinter passes the command either as separate arguments or as one tuple
+        if args and isinstance(args[0], tuple):
+            args = args[0] + args[1:]
+        if not args:
+            return ""
+        if args[0] == self._widget_path and len(args) > 1:
+            if args[1] == "create" and len(args) > 2:
+                return "create " + str(args[2])
+            return str(args[1])
+        return str(args[0])
+
+    def __caller(self):
+        frame = sys._getframe(2)
+        while frame is not None and frame.f_code.co_filename.startswith(self._skip_prefixes):
+            frame = frame.f_back
+        if frame is None:
+            return "?"
+        code = frame.f_code
+        name = self._caller_names.get(code)
+        if name is None:
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            name = self._caller_names[code] = module + "." + code.co_name
+        return name
+
+    def __record(self, operation, caller, seconds):
+        for table in (self._operations, self._callers.setdefault(caller, {}), self._frame_operations):
+            entry = table.get(operation)
+            if entry is None:
+                table[operation] = [1, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+
+    def end_frame(self):
+        """
+        Closes the current frame's summary.  Called by the canvas after every frame scheduler tick.
+        """
+        self._frame_count += 1
+        summary = self.__summarize(self._frame_operations)
+        summary["frame"] = self._frame_count
+        self._frames.append(summary)
+        self._frame_operations = {}
+
+    def __summarize(self, operations):
+        busy = {operation: entry for operation, entry in operations.items()
+                if operation not in self.IDLE_OPERATIONS}
+        return {
+            "calls": sum(entry[0] for entry in busy.values()),
+            "seconds": sum(entry[1] for entry in busy.values()),
+            "operations": {operation: {"calls": calls, "seconds": seconds}
+                           for operation, (calls, seconds) in sorted(operations.items(),
+                                                                     key=lambda item: -item[1][1])},
+        }
+
+    def summary(self):
+        """
+        Returns a dict with
+            "session": "calls", "seconds" and "operations" (operation -> "calls" and "seconds") for the whole
+                session, and its "elapsed" wall clock seconds
+            "callers": the same per calling function, slowest first
+            "frames": the same per frame, with its "frame" number
+        """
+        session = self.__summarize(self._operations)
+        session["elapsed"] = self._clock() - self._started_at
+        callers = {caller: self.__summarize(operations) for caller, operations in self._callers.items()}
+        return {
+            "session": session,
+            "callers": dict(sorted(callers.items(), key=lambda item: -item[1]["seconds"])),
+            "frames": list(self._frames),
+        }
+
+
+def _flatten_coords(coords):
+    """
+    Returns the coordinates as one flat tuple, however they are nested in lists and tuples, the way Tk reads them.
+    """
+    flat = []
+    for value in coords:
+        if isinstance(value, (list, tuple)):
+            flat.extend(_flatten_coords(value))
+        else:
+            flat.append(value)
+    return tuple(flat)
+
+
 class Canvas(tkinter.Canvas):
     """
     Canvas is a simplified interface on top of the tkinter Canvas to allow for easier manipulation of graphical objects.
@@ -58,7 +360,26 @@ class Canvas(tkinter.Canvas):
     TOP refers to the top side of the window.
     """
 
-    def __init__(self, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, title=DEFAULT_TITLE):
+    DEFAULT_FPS = 30
+    """The default number of frames per second for frame callbacks is 30."""
+
+    HEADLESS_ENV_VAR = "GRAPHICS_HEADLESS"
+    """Set this environment variable to 1 to make every new Canvas a `HeadlessCanvas`."""
+
+    def __new__(cls, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, title=DEFAULT_TITLE, headless=None,
+                cache_geometry=True):
+        """
+        Returns a `HeadlessCanvas` instead of a Tk canvas when headless is True, or when headless is not
+        given and the `Canvas.HEADLESS_ENV_VAR` environment variable is set to a non-zero value.
+        """
+        if headless is None:
+            headless = os.environ.get(Canvas.HEADLESS_ENV_VAR, "") not in ("", "0")
+        if headless:
+            return HeadlessCanvas(width, height, title)
+        return super().__new__(cls)
+
+    def __init__(self, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, title=DEFAULT_TITLE, headless=None,
+                 cache_geometry=True):
         """
         When creating a canvas, you can optionally specify a width and height.  If no width and height are specified,
         the canvas is initialized with its default size.
@@ -66,6 +387,10 @@ class Canvas(tkinter.Canvas):
         Args:
             width: the width of the Canvas to create (or if not specified, uses `Canvas.DEFAULT_WIDTH`)
             height: the height of the Canvas to create (or if not specified, uses `Canvas.DEFAULT_HEIGHT`)
+            title: the text shown in the window titlebar
+            headless: if True, create a `HeadlessCanvas` with no window instead (see `Canvas.__new__`)
+            cache_geometry: if True (the default), keep a copy of every object's coordinates so the position and
+                size getters do not have to ask tkinter (see `Canvas.set_geometry_cache`)
         """
 
         # Create the main program window
@@ -115,6 +440,12 @@ class Canvas(tkinter.Canvas):
         self.wait_for_click_click_happened = False
         self.currently_waiting_for_click = False
 
+        # What the wait_for_* functions are blocked on ("click", "key", "button" or a text field name),
+        # what ended the wait, and the Tcl variable they sleep on until an event handler writes to it
+        self._waiting_for = None
+        self._wait_result = None
+        self._wake = tkinter.IntVar(self.main_window, value=0)
+
         # bind events
         self.focus_set()
         self.bind("<Button-1>", lambda event: self.__mouse_pressed(event))
@@ -122,7 +453,27 @@ class Canvas(tkinter.Canvas):
         self.bind("<Key>", lambda event: self.__key_pressed(event))
         self.bind("<Enter>", lambda event: self.__mouse_entered())
         self.bind("<Leave>", lambda event: self.__mouse_exited())
+        self.bind("<Destroy>", lambda event: self.__window_closed(), add="+")
+
+        # Number of groups created so far, used to give each group a unique tag
+        self._group_count = 0
+
+        # Shadow copy of object geometry: id -> [type, coords], and group tag -> set of ids.
+        # None when the geometry cache is turned off.
+        self._geometry = {} if cache_geometry else None
+        self._group_members = {}
 
+        # Frame callbacks, driven from the Tk event loop with after()
+        self._frames = FrameScheduler()
+        self._frame_job = None
+        self._frames_done = None
+
+        # Set while Tcl calls are traced, see start_tracing
+        self._tracer = None
+
+        # Decoded image files shared between image objects, and the image shown by each image object.  Holding
+        # on to the shown images stops them from being garbage collected while they are on the canvas.
+        self._images = ImageCache()
         self._image_gb_protection = {}
         self.pack()
         self.update()
@@ -192,6 +543,7 @@ class Canvas(tkinter.Canvas):
         # then having wait for click set currently waiting to false, then we go
         if self.currently_waiting_for_click:
             self.wait_for_click_click_happened = True
+            self.__wake(True)
             return
 
         self.wait_for_click_click_happened = True
@@ -207,7 +559,9 @@ class Canvas(tkinter.Canvas):
             event: an object representing the key press that just occurred.  Assumed to have a keysym property
                 containing the name of this key press.
         """
-        if self.on_key_pressed:
+        if self._waiting_for == "key":
+            self.__wake(event.keysym)
+        elif self.on_key_pressed:
             self.on_key_pressed(event.keysym)
         else:
             self.key_presses.append(event)
@@ -226,16 +580,220 @@ class Canvas(tkinter.Canvas):
         """
         self.mouse_on_canvas = False
 
-    def wait_for_click(self):
+    def wait_for_click(self, timeout=None):
         """
-        Waits until a mouse click occurs, and then returns.
+        Waits until a mouse click occurs, and then returns.  The program sleeps in the tkinter event loop while
+        waiting, so the window keeps redrawing and frame callbacks keep running.
+
+        Args:
+            timeout: the longest time to wait, in seconds, or None to wait for as long as it takes
+
+        Returns:
+            True if the mouse was clicked, False if the wait timed out or the window was closed.
         """
         self.currently_waiting_for_click = True
         self.wait_for_click_click_happened = False
-        while not self.wait_for_click_click_happened:
-            self.update()
-        self.currently_waiting_for_click = False
-        self.wait_for_click_click_happened = False
+        try:
+            clicked = self.__wait("click", timeout)
+        finally:
+            self.currently_waiting_for_click = False
+            self.wait_for_click_click_happened = False
+        return bool(clicked)
+
+    def wait_for_key(self, timeout=None):
+        """
+        Waits until a keyboard key is pressed.  The key press is returned here instead of going to the key press
+        handler or the list of new key presses.
+
+        Args:
+            timeout: the longest time to wait, in seconds, or None to wait for as long as it takes
+
+        Returns:
+            the name of the key pressed (its keysym, e.g. "a" or "Return"), or None if the wait timed out.
+        """
+        return self.__wait("key", timeout)
+
+    def wait_for_button_click(self, timeout=None):
+        """
+        Waits until one of the buttons made with `Canvas.create_button` is clicked.  The click is returned here
+        instead of going to the button click handler or the list of new button clicks.
+
+        Args:
+            timeout: the longest time to wait, in seconds, or None to wait for as long as it takes
+
+        Returns:
+            the title of the button clicked, or None if the wait timed out.
+        """
+        return self.__wait("button", timeout)
+
+    def wait_for_text_field(self, text_field_name, timeout=None):
+        """
+        Waits until Return is pressed in the text field with the specified name.
+
+        Args:
+            text_field_name: the name given when the text field was created.
+            timeout: the longest time to wait, in seconds, or None to wait for as long as it takes
+
+        Returns:
+            the contents of the text field, or None if the wait timed out or there is no such text field.
+        """
+        if text_field_name not in self.text_fields:
+            return None
+        return self.__wait(("text field", text_field_name), timeout)
+
+    def __wait(self, waiting_for, timeout):
+        """
+        Blocks in `tkinter.Misc.wait_variable` until an event handler, the timeout or closing the window calls
+        `Canvas.__wake`.  Tk sleeps until the next event arrives, so this uses no CPU while idle.
+
+        Returns:
+            the result passed to `Canvas.__wake`, which is None on a timeout.
+        """
+        self._waiting_for = waiting_for
+        self._wait_result = None
+        timer = None
+        if timeout is not None:
+            timer = self.after(max(0, int(timeout * 1000)), lambda: self.__wake(None))
+        try:
+            self.wait_variable(self._wake)
+        finally:
+            if timer is not None:
+                self.after_cancel(timer)
+            self._waiting_for = None
+        return self._wait_result
+
+    def __wake(self, result):
+        """
+        Ends the current wait, if any, with the given result.
+        """
+        if self._waiting_for is None:
+            return
+        self._wait_result = result
+        self._waiting_for = None
+        self._wake.set(self._wake.get() + 1)
+
+    def __window_closed(self):
+        """
+        Ends any wait for input and any `Canvas.run_frames`, so the program does not hang once the window is gone.
+        """
+        self.__wake(None)
+        self.stop_frames()
+
+    def add_frame_callback(self, callback):
+        """
+        Registers a function to be called once per frame while frames are running.  The function takes no arguments
+        and is removed when it returns False or raises StopIteration.
+
+        Args:
+            callback: the function to call every frame
+        """
+        self._frames.add(callback)
+
+    def remove_frame_callback(self, callback):
+        """
+        Stops calling the specified frame callback.
+
+        Args:
+            callback: a function previously passed to `Canvas.add_frame_callback`
+        """
+        self._frames.remove(callback)
+
+    def start_frames(self, fps=DEFAULT_FPS):
+        """
+        Starts calling the frame callbacks at the specified rate from the Tk event loop, and returns immediately.
+        Frames keep running while the program waits for input or calls `Canvas.run_frames`.
+
+        Args:
+            fps: the target number of frames per second
+        """
+        self.stop_frames()
+        self._frames.start(fps)
+        self._frame_job = self.after(0, self.__frame_tick)
+
+    def run_frames(self, fps=DEFAULT_FPS):
+        """
+        Runs the frame callbacks at the specified rate until none are left (or `Canvas.stop_frames` is called), and
+        then returns.  The window keeps responding to events in the meantime.
+
+        Args:
+            fps: the target number of frames per second
+        """
+        if not self._frames.callbacks:
+            return
+        self.start_frames(fps)
+        self._frames_done = tkinter.BooleanVar(self, False)
+        self.wait_variable(self._frames_done)
+        self._frames_done = None
+
+    def stop_frames(self):
+        """
+        Stops calling the frame callbacks.  Registered callbacks stay registered.
+        """
+        if self._frame_job is not None:
+            try:
+                self.after_cancel(self._frame_job)
+            except tkinter.TclError:
+                pass # The window is being destroyed
+            self._frame_job = None
+        self._frames.running = False
+        if self._frames_done is not None:
+            self._frames_done.set(True)
+
+    def get_frame_stats(self):
+        """
+        Returns statistics about the frames run since frames were last started, see `FrameScheduler.stats`.
+        """
+        return self._frames.stats()
+
+    def __frame_tick(self):
+        """
+        Runs the frames that are due and schedules the next tick, or stops once no callbacks are left.  If a callback
+        raises, frames stop (ending `Canvas.run_frames`) and Tk reports the error.
+        """
+        self._frame_job = None
+        delay = None
+        try:
+            delay = self._frames.tick()
+            if self._tracer is not None and self.tk is self._tracer:
+                self._tracer.end_frame()
+        finally:
+            if delay is None:
+                self.stop_frames()
+            else:
+                self._frame_job = self.after(int(delay * 1000), self.__frame_tick)
+
+    def start_tracing(self):
+        """
+        Starts a new tracing session: from now on every Tcl call made by the canvas is counted and timed, by
+        operation, by calling function and by frame (see `TclTracer`).  Tracing is off until this is called.
+        """
+        self.stop_tracing()
+        self._tracer = TclTracer(self.tk, self._w)
+        self.tk = self._tracer
+
+    def stop_tracing(self):
+        """
+        Stops tracing.  The results stay available from `Canvas.get_trace` until tracing is started again.
+        """
+        if self._tracer is not None and self.tk is self._tracer:
+            self.tk = self._tracer._tk
+
+    def get_trace(self):
+        """
+        Returns the results of the current or last tracing session, see `TclTracer.summary`, or None if tracing
+        was never started.
+        """
+        return self._tracer.summary() if self._tracer is not None else None
+
+    def dump_trace(self, file_path):
+        """
+        Saves the results of the current or last tracing session as JSON.
+
+        Args:
+            file_path: the file to write
+        """
+        with open(file_path, "w") as trace_file:
+            json.dump(self.get_trace(), trace_file, indent=2)
 
     def get_mouse_x(self):
         """
@@ -301,7 +859,9 @@ class Canvas(tkinter.Canvas):
         Args:
             title: the name of the button that was clicked.
         """
-        if self.on_button_clicked:
+        if self._waiting_for == "button":
+            self.__wake(title)
+        elif self.on_button_clicked:
             self.on_button_clicked(title)
         else:
             self.button_clicks.append(title)
@@ -389,10 +949,22 @@ class Canvas(tkinter.Canvas):
         text_field_label.pack(side=pack_location)
         text_field = tkinter.Entry(frame, **kwargs)
         text_field.pack(side=pack_location)
+        text_field.bind("<Return>", lambda event: self.__text_field_submitted(label))
         self.text_fields[label] = (text_field, text_field_label)
         self.update()
         return text_field, text_field_label
 
+    def __text_field_submitted(self, text_field_name):
+        """
+        Called every time Return is pressed in a text field.  Ends `Canvas.wait_for_text_field` if it is waiting
+        for this text field.
+
+        Args:
+            text_field_name: the name given when the text field was created.
+        """
+        if self._waiting_for == ("text field", text_field_name):
+            self.__wake(self.get_text_field_text(text_field_name))
+
     def delete_text_field(self, text_field_name):
         """
         Removes the text field and corresponding label from both the canvas and the internal data
@@ -424,6 +996,140 @@ class Canvas(tkinter.Canvas):
 
     """ GRAPHICAL OBJECT MANIPULATION """
 
+    def set_geometry_cache(self, enabled):
+        """
+        Turns the geometry cache on or off.  While it is on, the canvas remembers the type and coordinates of the
+        objects it creates and updates them in its own create, coords, move, move_to and delete functions, so
+        `Canvas.get_left_x`, `Canvas.get_top_y`, `Canvas.get_obj_width`, `Canvas.get_obj_height`, `Canvas.coords`
+        and `Canvas.type` are answered without a round trip to Tcl.  Turn it off if objects are changed through
+        tkinter functions this class does not wrap (such as scale), or call `Canvas.invalidate_geometry` after
+        doing so.
+
+        Args:
+            enabled: True to use the cache, False to always ask tkinter
+        """
+        if enabled and self._geometry is None:
+            self._geometry = {}
+        elif not enabled:
+            self._geometry = None
+        self._group_members = {}
+
+    def invalidate_geometry(self, obj=None):
+        """
+        Forgets the cached geometry of the specified object, or of every object if none is given.  It is looked up
+        again from tkinter the next time it is needed.
+
+        Args:
+            obj: the object (or group) to forget, or None for all objects
+        """
+        if self._geometry is None:
+            return
+        if obj is None:
+            self._geometry.clear()
+            return
+        for item in self.__cached_ids(obj):
+            self._geometry.pop(item, None)
+
+    def __remember(self, obj, obj_type, coords):
+        """
+        Stores the geometry of a newly created object, and returns the object.
+        """
+        if self._geometry is not None:
+            coords = [float(value) for value in coords]
+            if obj_type in ("rectangle", "oval"):
+                # tkinter keeps these as a normalized bounding box
+                coords = [min(coords[0], coords[2]), min(coords[1], coords[3]),
+                          max(coords[0], coords[2]), max(coords[1], coords[3])]
+            self._geometry[obj] = [obj_type, coords]
+        return obj
+
+    def __cached_ids(self, obj):
+        """
+        Returns the ids of the objects that obj refers to, or None if obj is a tag the cache does not track.
+        """
+        if isinstance(obj, str) and obj.isdigit():
+            obj = int(obj)
+        if isinstance(obj, int):
+            return [obj]
+        if obj == "all":
+            return list(self._geometry)
+        if obj in self._group_members:
+            return list(self._group_members[obj])
+        return None
+
+    def __geometry(self, obj):
+        """
+        Returns the cached [type, coords] entry for a single object, fetching it from tkinter on a miss, or None if
+        the cache is off or obj is not a single object.
+        """
+        if self._geometry is None:
+            return None
+        if isinstance(obj, str) and obj.isdigit():
+            obj = int(obj)
+        if not isinstance(obj, int):
+            return None
+        entry = self._geometry.get(obj)
+        if entry is None:
+            obj_type = super(Canvas, self).type(obj)
+            if not obj_type:
+                return None
+            entry = [obj_type, super(Canvas, self).coords(obj)]
+            self._geometry[obj] = entry
+        return entry
+
+    def type(self, obj):
+        """
+        Same as `tkinter.Canvas.type`: returns the type of the specified object, e.g. "rectangle".
+        """
+        entry = self.__geometry(obj)
+        if entry is not None:
+            return entry[0]
+        return super(Canvas, self).type(obj)
+
+    def coords(self, obj, *args):
+        """
+        Same as `tkinter.Canvas.coords`: returns the coordinates of the specified object, or sets them if new
+        coordinates are given.
+        """
+        if args:
+            result = super(Canvas, self).coords(obj, *args)
+            self.invalidate_geometry(obj)
+            return result
+        entry = self.__geometry(obj)
+        if entry is not None:
+            return list(entry[1])
+        return super(Canvas, self).coords(obj)
+
+    def addtag_withtag(self, newtag, tagOrId):
+        """
+        Same as `tkinter.Canvas.addtag_withtag`, also keeping track of group membership for the geometry cache.
+        """
+        super(Canvas, self).addtag_withtag(newtag, tagOrId)
+        if self._geometry is None:
+            return
+        if newtag in self._group_members:
+            members = self.__cached_ids(tagOrId)
+            if members is None:
+                # Membership is no longer known, so moves of this group invalidate its objects instead
+                del self._group_members[newtag]
+            else:
+                self._group_members[newtag].update(members)
+
+    def dtag(self, *args):
+        """
+        Same as `tkinter.Canvas.dtag`, also keeping track of group membership for the geometry cache.
+        """
+        super(Canvas, self).dtag(*args)
+        if self._geometry is None:
+            return
+        removed_tag = args[1] if len(args) > 1 else args[0]
+        if removed_tag in self._group_members:
+            members = self.__cached_ids(args[0])
+            if members is None:
+                del self._group_members[removed_tag]
+            else:
+                self._group_members[removed_tag].difference_update(members)
+
     def get_left_x(self, obj):
         """
         Returns the leftmost x coordinate of the specified graphical object.
@@ -434,6 +1140,9 @@ class Canvas(tkinter.Canvas):
         Returns:
             the leftmost x coordinate of the specified graphical object.
         """
+        entry = self.__geometry(obj)
+        if entry is not None and entry[0] != "text":
+            return entry[1][0]
         if self.type(obj) != "text":
             return self.coords(obj)[0]
         else:
@@ -449,10 +1158,13 @@ class Canvas(tkinter.Canvas):
         Returns:
             the topmost y coordinate of the specified graphical object.
         """
+        entry = self.__geometry(obj)
+        if entry is not None and entry[0] != "text":
+            return entry[1][1]
         if self.type(obj) != "text":
             return self.coords(obj)[1]
         else:
-            return self.coords(obj)[1] - self.get_height(obj) / 2
+            return self.coords(obj)[1] - self.get_obj_height(obj) / 2
 
     def get_obj_width(self, obj):
         """
@@ -464,9 +1176,11 @@ class Canvas(tkinter.Canvas):
         Returns:
             the width of the specified graphical object.
         """
-        if len(self.coords(obj)) == 2:  # two-dimensional coords
-            return self.bbox(obj)[2] - self.bbox(obj)[0]
-        return self.coords(obj)[2] - self.coords(obj)[0]
+        coords = self.coords(obj)
+        if len(coords) == 2:  # two-dimensional coords
+            bbox = self.bbox(obj)
+            return bbox[2] - bbox[0]
+        return coords[2] - coords[0]
 
     def get_obj_height(self, obj):
         """
@@ -478,9 +1192,11 @@ class Canvas(tkinter.Canvas):
         Returns:
             the height of the specified graphical object.
         """
-        if len(self.coords(obj)) == 2:  # two-dimensional coords
-            return self.bbox(obj)[3] - self.bbox(obj)[1]
-        return self.coords(obj)[3] - self.coords(obj)[1]
+        coords = self.coords(obj)
+        if len(coords) == 2:  # two-dimensional coords
+            bbox = self.bbox(obj)
+            return bbox[3] - bbox[1]
+        return coords[3] - coords[1]
 
     def move_to(self, obj, new_x, new_y):
         """
@@ -513,6 +1229,89 @@ class Canvas(tkinter.Canvas):
             dy: the amount by which to change the object's y position
         """
         super(Canvas, self).move(obj, dx, dy)
+        if self._geometry is None:
+            return
+        items = self.__cached_ids(obj)
+        if items is None:
+            # A tag the cache does not track, so any object might have moved
+            self._geometry.clear()
+            return
+        for item in items:
+            entry = self._geometry.get(item)
+            if entry is not None:
+                coords = entry[1]
+                coords[0::2] = [x + dx for x in coords[0::2]]
+                coords[1::2] = [y + dy for y in coords[1::2]]
+
+    """ GROUPS """
+
+    def create_group(self, objs=()):
+        """
+        Creates a group of graphical objects that can be moved together with a single call.  Groups are tkinter tags,
+        so a group name can be passed anywhere an object is accepted, e.g. to `Canvas.move` or `Canvas.delete`.
+
+        Args:
+            objs: the objects to put in the group to begin with
+
+        Returns:
+            the name of the new group.
+        """
+        self._group_count += 1
+        group = "group{}".format(self._group_count)
+        if getattr(self, "_geometry", None) is not None:
+            self._group_members[group] = set()
+        for obj in objs:
+            self.add_to_group(group, obj)
+        return group
+
+    def add_to_group(self, group, obj):
+        """
+        Adds the specified object (or every object in another group) to a group.
+
+        Args:
+            group: the group name returned by `Canvas.create_group`
+            obj: the object to add
+        """
+        self.addtag_withtag(group, obj)
+
+    def remove_from_group(self, group, obj):
+        """
+        Removes the specified object from a group.  The object stays on the canvas.
+
+        Args:
+            group: the group name returned by `Canvas.create_group`
+            obj: the object to remove
+        """
+        self.dtag(obj, group)
+
+    def get_group_objects(self, group):
+        """
+        Returns a tuple of the objects in a group, from back to front.
+
+        Args:
+            group: the group name returned by `Canvas.create_group`
+        """
+        return self.find_withtag(group)
+
+    def move_group(self, group, dx, dy):
+        """
+        Moves every object in a group by the specified amounts, with a single call to tkinter.
+
+        Args:
+            group: the group name returned by `Canvas.create_group`
+            dx: the amount by which to change the objects' x position
+            dy: the amount by which to change the objects' y position
+        """
+        self.move(group, dx, dy)
+
+    def get_group_bbox(self, group):
+        """
+        Returns the bounding box (x1, y1, x2, y2) around every object in a group, or None if the group is empty.
+
+        Args:
+            group: the group name returned by `Canvas.create_group`
+        """
+        return self.bbox(group)
 
     def delete(self, obj):
         """
@@ -521,13 +1320,31 @@ class Canvas(tkinter.Canvas):
         Args:
             obj: the graphical object to remove from the canvas
         """
+        if self._image_gb_protection:
+            for item in self.find_withtag(obj):
+                self._image_gb_protection.pop(item, None)
         super(Canvas, self).delete(obj)
+        if self._geometry is None:
+            return
+        items = self.__cached_ids(obj)
+        if items is None:
+            self._geometry.clear()
+            return
+        for item in items:
+            self._geometry.pop(item, None)
+            for members in self._group_members.values():
+                members.discard(item)
 
     def clear(self):
         """
         Remove all graphical objects from the canvas.
         """
         super(Canvas, self).delete('all')
+        self._image_gb_protection.clear()
+        if self._geometry is not None:
+            self._geometry.clear()
+            for members in self._group_members.values():
+                members.clear()
 
     def find_overlapping(self, x1, y1, x2, y2):
         """
@@ -598,7 +1415,8 @@ class Canvas(tkinter.Canvas):
         Returns:
             the graphical line object between the two specified points.
         """
-        return super(Canvas, self).create_line(x1, y1, x2, y2, fill=color)
+        return self.__remember(super(Canvas, self).create_line(x1, y1, x2, y2, fill=color),
+                               "line", (x1, y1, x2, y2))
 
     def create_rectangle(self, x1, y1, x2, y2, color="black"):
         """
@@ -615,8 +1433,8 @@ class Canvas(tkinter.Canvas):
         Returns:
             the graphical rectangle object at the specified location.
         """
-        return super(Canvas, self).create_rectangle(
-            x1, y1, x2, y2, fill=color, outline=color)
+        return self.__remember(super(Canvas, self).create_rectangle(
+            x1, y1, x2, y2, fill=color, outline=color), "rectangle", (x1, y1, x2, y2))
 
     def create_oval(self, x1, y1, x2, y2, color="black"):
         """
@@ -633,8 +1451,16 @@ class Canvas(tkinter.Canvas):
         Returns:
             the graphical oval object at the specified location.
         """
-        return super(Canvas, self).create_oval(
-            x1, y1, x2, y2, fill=color, outline=color)
+        return self.__remember(super(Canvas, self).create_oval(
+            x1, y1, x2, y2, fill=color, outline=color), "oval", (x1, y1, x2, y2))
+
+    def create_polygon(self, *args, **kwargs):
+        """
+        Same as `tkinter.Canvas.create_polygon`: creates and returns a polygon through the specified points, given
+        either as separate x and y values or as sequences of them.
+        """
+        return self.__remember(super(Canvas, self).create_polygon(*args, **kwargs),
+                               "polygon", _flatten_coords(args))
 
     def create_text(self, x, y, text, anchor, font, color="black"):
         """
@@ -779,17 +1605,552 @@ class Canvas(tkinter.Canvas):
         Returns:
             the graphical image object that is displaying the specified image at the specified location.
         """
+        size = (width, height) if width is not None and height is not None else None
+        image = self._images.get(self._images.key(file_path, size), lambda: self.__load_image(file_path, size))
+        img_obj = super().create_image(x, y, anchor="nw", image=image, **kwargs)
+        # note: if you don't do this, the image gets garbage collected!!!
+        # delete and clear let go of it again
+        self._image_gb_protection[img_obj] = image
+        return self.__remember(img_obj, "image", (x, y))
+
+    @staticmethod
+    def __load_image(file_path, size):
+        """
+        Decodes an image file, resized to size if it is not None, into a PhotoImage.
+        """
         from PIL import ImageTk
         from PIL import Image
         image = Image.open(file_path)
 
         # Resize the image if another width and height is specified
-        if width is not None and height is not None:
-            image = image.resize((width, height))
+        if size is not None:
+            image = image.resize(size)
 
-        image = ImageTk.PhotoImage(image)
-        img_obj = super().create_image(x, y, anchor="nw", image=image, **kwargs)
-        # note: if you don't do this, the image gets garbage collected!!!
-        # this introduces a memory leak which can be fixed by overloading delete
-        self._image_gb_protection[img_obj] = image
-        return img_obj
+        return ImageTk.PhotoImage(image)
+
+    def set_image_cache_size(self, max_size):
+        """
+        Sets how many decoded image files are kept for reuse by `Canvas.create_image` and
+        `Canvas.create_image_with_size` (64 by default).  0 turns the cache off.
+
+        Args:
+            max_size: the number of images to keep
+        """
+        self._images.max_size = max_size
+        self._images.shrink()
+
+    def clear_image_cache(self):
+        """
+        Forgets all cached image files.  Images still on the canvas stay visible.
+        """
+        self._images.clear()
+
+    def get_image_cache_stats(self):
+        """
+        Returns statistics about the image cache, see `ImageCache.stats`.
+        """
+        return self._images.stats()
+
+    def create_image_from_pil(self, x, y, image, **kwargs):
+        """
+        Creates an image object showing an in-memory PIL image, with its top-left corner at the specified position.
+        Use this to show pictures that are drawn off-screen instead of loaded from a file.
+
+        Args:
+            x: the x coordinate of the top-left corner of the image on the canvas
+            y: the y coordinate of the top-left corner of the image on the canvas
+            image: the PIL image to display
+            kwargs: other tkinter keyword args
+
+        Returns:
+            the graphical image object that is displaying the specified image at the specified location.
+        """
+        from PIL import ImageTk
+        photo = ImageTk.PhotoImage(image)
+        img_obj = super().create_image(x, y, anchor="nw", image=photo, **kwargs)
+        self._image_gb_protection[img_obj] = photo
+        return self.__remember(img_obj, "image", (x, y))
+
+    def set_pil_image(self, obj, image):
+        """
+        Replaces the picture shown by an image object made with `Canvas.create_image_from_pil`.  The new image must
+        be the same size as the original one.  The pixels are copied into the existing image, so no new canvas
+        object is created.
+
+        Args:
+            obj: the image object to update
+            image: the PIL image to display instead
+        """
+        self._image_gb_protection[obj].paste(image)
+
+
+class HeadlessCanvas:
+    """
+    HeadlessCanvas has the same interface as `Canvas` but never creates a window or talks to Tcl.  Graphical
+    objects are kept in plain Python dictionaries, so drawing code can run in tests and batch workers that have
+    no display.  Create one with `Canvas(width, height, headless=True)` or by setting the `GRAPHICS_HEADLESS`
+    environment variable, or directly with `HeadlessCanvas(width, height)`.
+
+    Mouse, key and button input never happens, so the waiting functions return immediately.  Text sizes are
+    estimated from the font size since there is no font renderer.
+    """
+
+    DEFAULT_WIDTH = Canvas.DEFAULT_WIDTH
+    DEFAULT_HEIGHT = Canvas.DEFAULT_HEIGHT
+    DEFAULT_TITLE = Canvas.DEFAULT_TITLE
+    LEFT = Canvas.LEFT
+    BOTTOM = Canvas.BOTTOM
+    RIGHT = Canvas.RIGHT
+    TOP = Canvas.TOP
+
+    # Approximate glyph size relative to the font size, used to estimate text bounding boxes
+    TEXT_WIDTH_FACTOR = 0.6
+    TEXT_HEIGHT_FACTOR = 1.3
+    DEFAULT_FONT_SIZE = 13
+
+    def __init__(self, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, title=DEFAULT_TITLE):
+        """
+        Args:
+            width: the width of the canvas
+            height: the height of the canvas
+            title: kept for compatibility with `Canvas`, there is no titlebar to show it in
+        """
+        self.width = width
+        self.height = height
+        self.title = title
+        self.background = "white"
+
+        self.on_mouse_pressed = None
+        self.on_mouse_released = None
+        self.on_key_pressed = None
+        self.on_button_clicked = None
+        self.mouse_on_canvas = False
+        self.mouse_presses = []
+        self.key_presses = []
+        self.button_clicks = []
+        self.text_fields = {}
+
+        # id -> item type, coordinates, options and tags.  Dict order is the stacking order, bottom first.
+        self._types = {}
+        self._coords = {}
+        self._options = {}
+        self._tags = {}
+        self._next_id = 1
+        self._group_count = 0
+
+        self._frames = FrameScheduler()
+
+        # Images are never decoded, the cache only exists so its (empty) stats can be read
+        self._images = ImageCache()
+
+        # There is no Tcl interpreter, so a trace only ever has empty frames
+        self._tracer = None
+
+    """ WINDOW AND INPUT """
+
+    def set_canvas_background_color(self, color):
+        self.background = color
+
+    def get_canvas_background_color(self):
+        return self.background
+
+    def get_width(self):
+        return self.width
+
+    def get_height(self):
+        return self.height
+
+    def wait_for_click(self, timeout=None):
+        """
+        There is no mouse, so this returns immediately as if the wait timed out.
+        """
+        return False
+
+    def wait_for_key(self, timeout=None):
+        return None
+
+    def wait_for_button_click(self, timeout=None):
+        return None
+
+    def wait_for_text_field(self, text_field_name, timeout=None):
+        return None
+
+    def get_mouse_x(self):
+        return 0
+
+    def get_mouse_y(self):
+        return 0
+
+    def get_new_mouse_clicks(self):
+        presses = self.mouse_presses
+        self.mouse_presses = []
+        return presses
+
+    def get_new_key_presses(self):
+        presses = self.key_presses
+        self.key_presses = []
+        return presses
+
+    def get_new_button_clicks(self):
+        clicks = self.button_clicks
+        self.button_clicks = []
+        return clicks
+
+    def create_button(self, title, location, **kwargs):
+        return None
+
+    def create_text_field(self, label, location, **kwargs):
+        self.text_fields[label] = ""
+        return None, None
+
+    def delete_text_field(self, text_field_name):
+        self.text_fields.pop(text_field_name, None)
+
+    def get_text_field_text(self, text_field_name):
+        return self.text_fields.get(text_field_name)
+
+    def add_frame_callback(self, callback):
+        self._frames.add(callback)
+
+    def remove_frame_callback(self, callback):
+        self._frames.remove(callback)
+
+    def start_frames(self, fps=Canvas.DEFAULT_FPS):
+        """
+        There is no event loop, so frames only run inside `HeadlessCanvas.run_frames`.
+        """
+        self._frames.start(fps)
+
+    def run_frames(self, fps=Canvas.DEFAULT_FPS):
+        """
+        Runs the frame callbacks until none are left.  Nothing is shown, so frames run back to back without waiting.
+        """
+        self._frames.start(fps)
+        try:
+            while self._frames.running:
+                delay = self._frames.tick()
+                if self._tracer is not None:
+                    self._tracer.end_frame()
+                if delay is None:
+                    break
+        finally:
+            self.stop_frames()
+
+    def stop_frames(self):
+        self._frames.running = False
+
+    def get_frame_stats(self):
+        return self._frames.stats()
+
+    def start_tracing(self):
+        self._tracer = TclTracer(None, "")
+
+    def stop_tracing(self):
+        pass
+
+    get_trace = Canvas.get_trace
+    dump_trace = Canvas.dump_trace
+
+    set_image_cache_size = Canvas.set_image_cache_size
+    clear_image_cache = Canvas.clear_image_cache
+    get_image_cache_stats = Canvas.get_image_cache_stats
+
+    def update(self):
+        pass
+
+    def update_idletasks(self):
+        pass
+
+    def mainloop(self):
+        pass
+
+    def bind(self, sequence=None, func=None, add=None):
+        pass
+
+    def focus_set(self):
+        pass
+
+    def pack(self, **kwargs):
+        pass
+
+    def config(self, **kwargs):
+        if "background" in kwargs:
+            self.background = kwargs["background"]
+
+    configure = config
+
+    """ GRAPHICAL OBJECT MANIPULATION """
+
+    def _new_item(self, item_type, coords, options):
+        item = self._next_id
+        self._next_id += 1
+        tags = options.pop("tags", ())
+        if isinstance(tags, str):
+            tags = (tags,)
+        self._types[item] = item_type
+        self._coords[item] = [float(value) for value in coords]
+        self._options[item] = options
+        self._tags[item] = list(tags)
+        return item
+
+    def _find(self, tag_or_id):
+        # Resolves an item id, "all" or a tag name to a list of item ids, bottom first
+        if isinstance(tag_or_id, str) and tag_or_id.isdigit():
+            tag_or_id = int(tag_or_id)
+        if isinstance(tag_or_id, int):
+            return [tag_or_id] if tag_or_id in self._types else []
+        if tag_or_id == "all":
+            return list(self._types)
+        return [item for item, tags in self._tags.items() if tag_or_id in tags]
+
+    def _first(self, tag_or_id):
+        items = self._find(tag_or_id)
+        return items[0] if items else None
+
+    def find_all(self):
+        return tuple(self._types)
+
+    def find_withtag(self, tag_or_id):
+        return tuple(self._find(tag_or_id))
+
+    def gettags(self, obj):
+        item = self._first(obj)
+        return tuple(self._tags[item]) if item is not None else ()
+
+    def addtag_withtag(self, new_tag, tag_or_id):
+        for item in self._find(tag_or_id):
+            if new_tag not in self._tags[item]:
+                self._tags[item].append(new_tag)
+
+    def dtag(self, tag_or_id, tag_to_delete=None):
+        tag_to_delete = tag_to_delete if tag_to_delete is not None else tag_or_id
+        for item in self._find(tag_or_id):
+            if tag_to_delete in self._tags[item]:
+                self._tags[item].remove(tag_to_delete)
+
+    # Groups are tags here too, so the Canvas implementations work unchanged
+    create_group = Canvas.create_group
+    add_to_group = Canvas.add_to_group
+    remove_from_group = Canvas.remove_from_group
+    get_group_objects = Canvas.get_group_objects
+    move_group = Canvas.move_group
+    get_group_bbox = Canvas.get_group_bbox
+
+    def type(self, obj):
+        item = self._first(obj)
+        return self._types[item] if item is not None else None
+
+    def coords(self, obj, *new_coords):
+        """
+        Same as `tkinter.Canvas.coords`: returns the coordinates of the object, or replaces them when new
+        coordinates are given (either as separate numbers or as one list).
+        """
+        item = self._first(obj)
+        if item is None:
+            return []
+        if new_coords:
+            if len(new_coords) == 1 and isinstance(new_coords[0], (list, tuple)):
+                new_coords = new_coords[0]
+            self._coords[item] = [float(value) for value in new_coords]
+        return list(self._coords[item])
+
+    def bbox(self, obj):
+        """
+        Returns the bounding box (x1, y1, x2, y2) enclosing all the specified objects, or None if there are none.
+        """
+        boxes = [self._item_bbox(item) for item in self._find(obj)]
+        if not boxes:
+            return None
+        return (min(box[0] for box in boxes), min(box[1] for box in boxes),
+                max(box[2] for box in boxes), max(box[3] for box in boxes))
+
+    def _item_bbox(self, item):
+        coords = self._coords[item]
+        item_type = self._types[item]
+        if item_type == "text":
+            width, height = self._text_size(item)
+            x, y = coords[0], coords[1]
+            return x - width / 2, y - height / 2, x + width / 2, y + height / 2
+        if item_type == "image":
+            options = self._options[item]
+            return coords[0], coords[1], coords[0] + options.get("width", 0), coords[1] + options.get("height", 0)
+        xs = coords[0::2]
+        ys = coords[1::2]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def _text_size(self, item):
+        options = self._options[item]
+        font = options.get("font")
+        size = self.DEFAULT_FONT_SIZE
+        if isinstance(font, (tuple, list)) and len(font) > 1:
+            size = abs(int(font[1]))
+        elif isinstance(font, str) and font.split()[1:2] and font.split()[1].lstrip("-").isdigit():
+            size = abs(int(font.split()[1]))
+        text = str(options.get("text", ""))
+        return len(text) * size * self.TEXT_WIDTH_FACTOR, size * self.TEXT_HEIGHT_FACTOR
+
+    def itemconfig(self, obj, **options):
+        for item in self._find(obj):
+            self._options[item].update(options)
+
+    itemconfigure = itemconfig
+
+    def itemcget(self, obj, option):
+        item = self._first(obj)
+        if item is None:
+            return ""
+        return self._options[item].get(option, "")
+
+    def get_left_x(self, obj):
+        return self.bbox(obj)[0] if self.type(obj) == "text" else self.coords(obj)[0]
+
+    def get_top_y(self, obj):
+        return self.bbox(obj)[1] if self.type(obj) == "text" else self.coords(obj)[1]
+
+    def get_obj_width(self, obj):
+        box = self.bbox(obj)
+        return box[2] - box[0]
+
+    def get_obj_height(self, obj):
+        box = self.bbox(obj)
+        return box[3] - box[1]
+
+    def move_to(self, obj, new_x, new_y):
+        self.move(obj, new_x - self.get_left_x(obj), new_y - self.get_top_y(obj))
+
+    def moveto(self, obj, x='', y=''):
+        self.move_to(obj, float(x), float(y))
+
+    def move(self, obj, dx, dy):
+        for item in self._find(obj):
+            coords = self._coords[item]
+            coords[0::2] = [x + dx for x in coords[0::2]]
+            coords[1::2] = [y + dy for y in coords[1::2]]
+
+    def delete(self, obj):
+        for item in self._find(obj):
+            del self._types[item]
+            del self._coords[item]
+            del self._options[item]
+            del self._tags[item]
+
+    def clear(self):
+        self.delete("all")
+
+    def find_overlapping(self, x1, y1, x2, y2):
+        """
+        Returns the ids of all objects whose bounding box overlaps the given rectangle, bottom first.
+        """
+        overlapping = []
+        for item in self._types:
+            left, top, right, bottom = self._item_bbox(item)
+            if left <= x2 and right >= x1 and top <= y2 and bottom >= y1:
+                overlapping.append(item)
+        return tuple(overlapping)
+
+    def set_fill_color(self, obj, fill_color):
+        self.itemconfig(obj, fill=fill_color)
+
+    def set_outline_color(self, obj, outline_color):
+        self.itemconfig(obj, outline=outline_color)
+
+    def set_color(self, obj, color):
+        self.set_fill_color(obj, color)
+        self.set_outline_color(obj, color)
+
+    def create_line(self, x1, y1, x2, y2, color="black", **kwargs):
+        return self._new_item("line", (x1, y1, x2, y2), dict(kwargs, fill=color))
+
+    def create_rectangle(self, x1, y1, x2, y2, color="black", **kwargs):
+        return self._new_item("rectangle", (x1, y1, x2, y2), dict(kwargs, fill=color, outline=color))
+
+    def create_oval(self, x1, y1, x2, y2, color="black", **kwargs):
+        return self._new_item("oval", (x1, y1, x2, y2), dict(kwargs, fill=color, outline=color))
+
+    def create_polygon(self, *coords, **kwargs):
+        return self._new_item("polygon", _flatten_coords(coords), dict(kwargs))
+
+    def create_text(self, x, y, text, anchor, font, color="black"):
+        return self._new_item("text", (x, y), {"text": text, "anchor": anchor, "font": font, "fill": color})
+
+    def set_text(self, obj, text):
+        self.itemconfig(obj, text=text)
+
+    def get_text(self, obj):
+        return self.itemcget(obj, "text")
+
+    def set_font(self, obj, font, size):
+        self.itemconfig(obj, font=(font, size))
+
+    def tag_raise(self, obj, above=None):
+        # Like Tk, the items go just above the topmost item of `above`, or on top of everything
+        moved = self._find(obj)
+        rest = [item for item in self._types if item not in moved]
+        if above is None:
+            position = len(rest)
+        else:
+            reference = self._reference(above, rest)
+            if not reference:
+                return
+            position = rest.index(reference[-1]) + 1
+        self._restack(rest[:position] + moved + rest[position:])
+
+    def tag_lower(self, obj, below=None):
+        # Like Tk, the items go just below the lowest item of `below`, or under everything
+        moved = self._find(obj)
+        rest = [item for item in self._types if item not in moved]
+        if below is None:
+            position = 0
+        else:
+            reference = self._reference(below, rest)
+            if not reference:
+                return
+            position = rest.index(reference[0])
+        self._restack(rest[:position] + moved + rest[position:])
+
+    def _reference(self, tag_or_id, rest):
+        # The items of `tag_or_id` that are not being moved, bottom first; none when it only names moved items
+        items = self._find(tag_or_id)
+        if not items:
+            raise tkinter.TclError(f'tagOrId "{tag_or_id}" doesn\'t match any items')
+        return [item for item in items if item in rest]
+
+    def _restack(self, order):
+        # The dicts keep the stacking order, bottom first
+        for table in (self._types, self._coords, self._options, self._tags):
+            items = {item: table[item] for item in order}
+            table.clear()
+            table.update(items)
+
+    def raise_to_front(self, obj):
+        self.tag_raise(obj)
+
+    def raise_in_front_of(self, obj, above):
+        self.tag_raise(obj, above)
+
+    def lower_to_back(self, obj):
+        self.tag_lower(obj)
+
+    def lower_behind(self, obj, behind):
+        self.tag_lower(obj, behind)
+
+    def create_image(self, x, y, file_path, **kwargs):
+        return self.create_image_with_size(x, y, None, None, file_path, **kwargs)
+
+    def create_image_with_size(self, x, y, width, height, file_path, **kwargs):
+        # Only the size is needed, and only if it was not given
+        if width is None or height is None:
+            try:
+                from PIL import Image
+                with Image.open(file_path) as image:
+                    width, height = image.size
+            except (ImportError, OSError):
+                width, height = 0, 0
+        return self._new_item("image", (x, y), dict(kwargs, file=file_path, width=width, height=height))
+
+    def create_image_from_pil(self, x, y, image, **kwargs):
+        width, height = image.size
+        return self._new_item("image", (x, y), dict(kwargs, image=image, width=width, height=height))
+
+    def set_pil_image(self, obj, image):
+        self.itemconfig(obj, image=image)
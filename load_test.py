@@ -0,0 +1,204 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from soils import get_registry
+
+"""
+File: load_test.py
+
+Load generator for design_server.py. Opens a number of keep-alive
+connections to the server and sends POST /evaluate requests on all of them
+at once, then reports throughput and latency.
+
+    python load_test.py [--url http://127.0.0.1:8765] [--connections 64]
+                        [--requests 20000] [--designs-per-request 1]
+                        [--output results.json]
+
+Without --url it starts design_server.py on a free localhost port itself
+and stops it afterwards. Every request carries --designs-per-request random
+designs (a single object when it is 1, a list otherwise). Latency is the
+time from sending a request to having its whole response, so it includes
+the time the server waits to fill a batch. The results are printed and can
+be saved as JSON together with the server's batching counters.
+"""
+
+DEFAULT_CONNECTIONS = 64
+DEFAULT_REQUESTS = 20000
+SEED = 2024
+
+
+def random_design(rng, soil_codes):
+    """
+    Returns a random valid design in the units of the HTTP API (mm).
+    """
+    foundation_type = rng.choice(["R", "I"])
+    return {
+        "soil_type": rng.choice(soil_codes),
+        "foundation_depth": rng.randint(600, 3000),
+        "foundation_width": rng.randint(300, 1500),
+        "number_of_floors": rng.randint(1, 4),
+        "building_area": rng.randint(50, 400),
+        "foundation_type": foundation_type,
+        "num_footings": 1 if foundation_type == "R" else rng.randint(1, 16),
+    }
+
+
+def make_bodies(count, designs_per_request, seed=SEED):
+    """
+    Encodes the request bodies up front so that encoding is not part of the measured time.
+    """
+    rng = random.Random(seed)
+    soil_codes = get_registry().codes()
+    bodies = []
+    for _ in range(count):
+        designs = [random_design(rng, soil_codes) for _ in range(designs_per_request)]
+        bodies.append(json.dumps(designs[0] if designs_per_request == 1 else designs).encode("utf-8"))
+    return bodies
+
+
+async def request(reader, writer, host, method, path, body=b""):
+    """
+    Sends one request on a keep-alive connection and returns (status, decoded JSON body).
+    """
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, bodies, latencies, errors):
+    # One connection working through its share of the requests, one at a time
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, host, "POST", "/evaluate", body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, connections=DEFAULT_CONNECTIONS, requests=DEFAULT_REQUESTS,
+                   designs_per_request=1):
+    """
+    Runs the load test against a running server.
+
+    Returns:
+        a dict with the settings, "seconds", "requests_per_second", "designs_per_second", "errors",
+        the "latency_ms" percentiles and the server's batching "server_stats" after the run.
+    """
+    bodies = make_bodies(requests, designs_per_request)
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*[client(host, port, bodies[i::connections], latencies, errors)
+                           for i in range(connections)])
+    seconds = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_stats = await request(reader, writer, host, "GET", "/stats")
+    writer.close()
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "connections": connections,
+        "requests": requests,
+        "designs_per_request": designs_per_request,
+        "seconds": seconds,
+        "requests_per_second": requests / seconds,
+        "designs_per_second": requests * designs_per_request / seconds,
+        "errors": len(errors),
+        "latency_ms": {
+            "mean": statistics.fmean(latencies_ms),
+            "p50": percentile(latencies_ms, 50),
+            "p90": percentile(latencies_ms, 90),
+            "p99": percentile(latencies_ms, 99),
+            "max": latencies_ms[-1],
+        },
+        "server_stats": server_stats,
+    }
+
+
+def percentile(sorted_values, percent):
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def start_server():
+    """
+    Starts design_server.py on a free localhost port and returns (process, port).
+    """
+    process = subprocess.Popen([sys.executable, "design_server.py", "--port", "0"], stdout=subprocess.PIPE,
+                               text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    line = process.stdout.readline()
+    if not line.startswith("Listening on "):
+        process.kill()
+        raise RuntimeError("design_server.py did not start")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+def print_results(results):
+    latency = results["latency_ms"]
+    server = results["server_stats"]
+    print(f"{results['requests']} requests of {results['designs_per_request']} design(s) "
+          f"over {results['connections']} connections in {results['seconds']:.2f} s")
+    print(f"Throughput: {results['requests_per_second']:,.0f} requests/s, "
+          f"{results['designs_per_second']:,.0f} designs/s")
+    print(f"Latency (ms): mean {latency['mean']:.2f}  p50 {latency['p50']:.2f}  p90 {latency['p90']:.2f}  "
+          f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}")
+    print(f"Server: {server['batches']} batches, mean {server['mean_batch']:.1f} and "
+          f"at most {server['largest_batch']} designs per batch")
+    if results["errors"]:
+        print(f"{results['errors']} requests failed")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for design_server.py")
+    parser.add_argument("--url", help="server to test, e.g. http://127.0.0.1:8765; starts one if not given")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--designs-per-request", type=int, default=1)
+    parser.add_argument("--output", help="also save the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.url:
+        host, _, port = args.url.split("://", 1)[-1].rstrip("/").rpartition(":")
+        port = int(port)
+    else:
+        process, port = start_server()
+        host = "127.0.0.1"
+    try:
+        results = asyncio.run(run_load(host, port, args.connections, args.requests, args.designs_per_request))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    sys.exit(1 if results["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
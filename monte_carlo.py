@@ -0,0 +1,130 @@
+import math
+
+import numpy as np
+
+from bearing_batch import compute_applied_pressure_batch, compute_ultimate_capacity_batch
+from final_project import sort_type
+
+"""
+File: monte_carlo.py
+
+Probabilistic version of the bearing check. Instead of collapsing a soil's
+[c_min, c_max, φ_min, φ_max, γ_min, γ_max] range to its median like main does,
+cohesion, friction angle and unit weight are drawn uniformly and independently
+from their ranges and q_ult is evaluated for every draw.
+
+Samples are generated and evaluated in fixed-size chunks, so memory use depends
+on chunk_size only. q_ult percentiles come from a fixed-bin histogram between
+the smallest and largest possible q_ult, which is accurate to one bin width.
+"""
+
+DEFAULT_SAMPLES = 1_000_000
+DEFAULT_CHUNK_SIZE = 1_000_000
+DEFAULT_PERCENTILES = (5, 50, 95)
+HISTOGRAM_BINS = 8192
+
+# z value for the 95% confidence interval on the probability of failure
+Z_95 = 1.959963984540054
+
+
+def simulate_bearing_capacity(soil_type, foundation_depth, foundation_width, number_of_floors,
+                              building_area, foundation_type, num_footings=1,
+                              samples=DEFAULT_SAMPLES, seed=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                              percentiles=DEFAULT_PERCENTILES):
+    """
+    Estimates the probability that the soil fails under the building.
+    Depth and width are in m.
+
+    Args:
+        soil_type: soil code, e.g. "LS" or "SC"
+        samples: total number of soil property samples to draw
+        seed: seed for the random generator, for reproducible runs
+        chunk_size: number of samples evaluated per vectorized pass
+        percentiles: q_ult percentiles (0-100) to report
+
+    Returns:
+        a dict with
+            "samples": number of samples drawn
+            "q_applied": the applied pressure in kN/m²
+            "probability_of_failure": fraction of samples with q_ult <= q_applied
+            "standard_error": standard error of that fraction
+            "confidence_interval": 95% Wilson interval for the probability of failure
+            "q_ult_percentiles": dict of percentile -> q_ult
+            "q_ult_mean": mean q_ult
+            "percentile_resolution": histogram bin width, the accuracy of the percentiles
+            "convergence": list of (samples so far, probability of failure) after each chunk
+    """
+    if samples < 1:
+        raise ValueError("samples must be at least 1")
+    type_name, soil_characteristics = sort_type(soil_type)
+    c_min, c_max, phi_min, phi_max, gamma_min, gamma_max = soil_characteristics
+    if foundation_type == "R":
+        num_footings = 1 # For raft foundation, we consider it as one footing
+    q_applied = float(compute_applied_pressure_batch(foundation_width, number_of_floors,
+                                                     building_area, num_footings))
+
+    # q_ult grows with c, φ and γ, so the range corners bound every sample
+    q_low = float(compute_ultimate_capacity_batch(c_min, phi_min, gamma_min,
+                                                  foundation_depth, foundation_width)[0])
+    q_high = float(compute_ultimate_capacity_batch(c_max, phi_max, gamma_max,
+                                                   foundation_depth, foundation_width)[0])
+    bin_width = max(q_high - q_low, 1e-9) / HISTOGRAM_BINS
+    counts = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    failures = 0
+    q_ult_sum = 0.0
+    done = 0
+    convergence = []
+    while done < samples:
+        size = min(chunk_size, samples - done)
+        cohesion = rng.uniform(c_min, c_max, size)
+        friction_angle = rng.uniform(phi_min, phi_max, size)
+        unit_weight = rng.uniform(gamma_min, gamma_max, size)
+        q_ult = compute_ultimate_capacity_batch(cohesion, friction_angle, unit_weight,
+                                                foundation_depth, foundation_width)[0]
+
+        failures += int(np.count_nonzero(q_ult <= q_applied))
+        q_ult_sum += float(q_ult.sum())
+        bins = ((q_ult - q_low) / bin_width).astype(np.int64)
+        np.clip(bins, 0, HISTOGRAM_BINS - 1, out=bins)
+        counts += np.bincount(bins, minlength=HISTOGRAM_BINS)
+
+        done += size
+        convergence.append((done, failures / done))
+
+    probability = failures / samples
+    return {
+        "samples": samples,
+        "q_applied": q_applied,
+        "probability_of_failure": probability,
+        "standard_error": math.sqrt(probability * (1 - probability) / samples),
+        "confidence_interval": wilson_interval(failures, samples),
+        "q_ult_percentiles": {p: _histogram_percentile(counts, q_low, bin_width, p) for p in percentiles},
+        "q_ult_mean": q_ult_sum / samples,
+        "percentile_resolution": bin_width,
+        "convergence": convergence,
+    }
+
+
+def wilson_interval(failures, samples, z=Z_95):
+    """
+    Wilson score interval for a binomial proportion. Unlike the normal
+    approximation it stays meaningful when no failures were observed.
+    """
+    p = failures / samples
+    denominator = 1 + z ** 2 / samples
+    center = (p + z ** 2 / (2 * samples)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / samples + z ** 2 / (4 * samples ** 2)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def _histogram_percentile(counts, low, bin_width, percentile):
+    # Linear interpolation inside the bin where the cumulative count crosses the target
+    cumulative = np.cumsum(counts)
+    target = percentile / 100 * cumulative[-1]
+    index = int(np.searchsorted(cumulative, target))
+    index = min(index, len(counts) - 1)
+    below = cumulative[index - 1] if index > 0 else 0
+    fraction = (target - below) / counts[index] if counts[index] else 0.0
+    return float(low + (index + fraction) * bin_width)
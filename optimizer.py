@@ -0,0 +1,147 @@
+import numpy as np
+
+from bearing_batch import compute_bearing_factors_batch, footings_for_type
+from final_project import FLOOR_WEIGHT
+from soils import get_soil
+
+"""
+File: optimizer.py
+
+Finds the smallest footing that passes the bearing check instead of trying
+widths and depths by hand through foundation_properties.
+
+A design passes when q_ult > factor_of_safety * q_applied. With the median
+soil properties, q_ult = a + b * B where a = c * Nc + gamma * D * Nq and
+b = 0.5 * gamma * Ng, while q_applied = W / (n * B²). The margin
+q_ult - factor_of_safety * q_applied therefore grows with both B and D:
+depth has a closed-form solution and width is found by bisection, for
+every building at once.
+
+All inputs may be scalars or arrays (one entry per building). Widths and
+depths are in mm, like the prompts, and results are rounded up to whole mm
+within the 300-1500 mm width and 600-3000 mm depth limits. Designs that
+cannot pass inside the limits come back as NaN.
+"""
+
+MIN_DEPTH = 600
+MAX_DEPTH = 3000
+MIN_WIDTH = 300
+MAX_WIDTH = 1500
+
+# Each bisection step halves the bracket, 40 steps take 1200 mm well below 1e-6 mm
+BISECTION_STEPS = 40
+
+
+def soil_medians(soil_type):
+    """
+    Returns arrays of median cohesion, friction angle and unit weight for an
+    array of soil codes.
+    """
+    codes, inverse = np.unique(np.asarray(soil_type), return_inverse=True)
+    medians = np.array([get_soil(code).medians for code in codes], dtype=float)
+    medians = medians[inverse.reshape(np.shape(soil_type))]
+    return medians[..., 0], medians[..., 1], medians[..., 2]
+
+
+def _capacity_terms(soil_type):
+    # q_ult = cohesion_term + unit_weight * D * Nq + width_term * B, depth in m
+    cohesion, friction_angle, unit_weight = soil_medians(soil_type)
+    Nc, Nq, Ng = compute_bearing_factors_batch(friction_angle)
+    return cohesion * Nc, unit_weight * Nq, 0.5 * unit_weight * Ng
+
+
+def _load_per_footing(number_of_floors, building_area, foundation_type, num_footings):
+    num_footings = footings_for_type(foundation_type, num_footings)
+    total_load = FLOOR_WEIGHT * np.asarray(number_of_floors, dtype=float) * np.asarray(building_area, dtype=float)
+    return total_load / num_footings
+
+
+def minimum_width(soil_type, foundation_depth, number_of_floors, building_area, foundation_type,
+                  num_footings=1, factor_of_safety=1.0):
+    """
+    Smallest footing width that passes at the given depth.
+
+    Args:
+        soil_type: soil code(s), e.g. "LS"
+        foundation_depth: depth(s) in mm
+        number_of_floors: number of floors
+        building_area: building floor area(s) in m²
+        foundation_type: "R" or "I"
+        num_footings: number of footings for isolated foundations
+        factor_of_safety: required q_ult / q_applied
+
+    Returns:
+        the width(s) in mm, or NaN where even a 1500 mm footing fails.
+    """
+    cohesion_term, depth_term, width_term = _capacity_terms(soil_type)
+    load = _load_per_footing(number_of_floors, building_area, foundation_type, num_footings)
+    base = cohesion_term + depth_term * np.asarray(foundation_depth, dtype=float) / 1000
+    base, width_term, load = np.broadcast_arrays(base, width_term, load)
+
+    def margin(width_mm):
+        width = width_mm / 1000
+        return base + width_term * width - factor_of_safety * load / width ** 2
+
+    low = np.full(base.shape, float(MIN_WIDTH))
+    high = np.full(base.shape, float(MAX_WIDTH))
+    feasible = margin(high) > 0
+    already = margin(low) > 0
+
+    # Invariant: margin(low) <= 0 < margin(high)
+    for _ in range(BISECTION_STEPS):
+        middle = (low + high) / 2
+        passes = margin(middle) > 0
+        high = np.where(passes, middle, high)
+        low = np.where(passes, low, middle)
+
+    width = np.ceil(high)
+    width = np.where(already, MIN_WIDTH, width)
+    width = np.where(feasible, width, np.nan)
+    return width if width.ndim else float(width)
+
+
+def minimum_depth(soil_type, foundation_width, number_of_floors, building_area, foundation_type,
+                  num_footings=1, factor_of_safety=1.0):
+    """
+    Smallest foundation depth that passes at the given width, from the closed form
+    D = (factor_of_safety * q_applied - c * Nc - 0.5 * gamma * B * Ng) / (gamma * Nq)
+
+    Args:
+        foundation_width: width(s) in mm
+        the rest as for `minimum_width`
+
+    Returns:
+        the depth(s) in mm, or NaN where even a 3000 mm deep foundation fails.
+    """
+    cohesion_term, depth_term, width_term = _capacity_terms(soil_type)
+    load = _load_per_footing(number_of_floors, building_area, foundation_type, num_footings)
+    width = np.asarray(foundation_width, dtype=float) / 1000
+    q_applied = load / width ** 2
+
+    required = (factor_of_safety * q_applied - cohesion_term - width_term * width) / depth_term * 1000
+    # Strictly above the break-even depth, rounded to whole mm
+    depth = np.maximum(np.floor(required) + 1, MIN_DEPTH)
+    depth = np.where(depth <= MAX_DEPTH, depth, np.nan)
+    return depth if depth.ndim else float(depth)
+
+
+def design_footing(soil_type, number_of_floors, building_area, foundation_type, num_footings=1,
+                   factor_of_safety=1.0):
+    """
+    Smallest footing for each building: the minimum width at the shallowest depth
+    (600 mm) when that works, otherwise the widest footing (1500 mm) at the
+    minimum depth that passes.
+
+    Returns:
+        depth and width arrays in mm, both NaN where no design inside the limits passes.
+    """
+    width = np.asarray(minimum_width(soil_type, MIN_DEPTH, number_of_floors, building_area,
+                                     foundation_type, num_footings, factor_of_safety))
+    depth = np.asarray(minimum_depth(soil_type, MAX_WIDTH, number_of_floors, building_area,
+                                     foundation_type, num_footings, factor_of_safety))
+    width, depth = np.broadcast_arrays(width, depth)
+
+    shallow = ~np.isnan(width)
+    depth = np.where(shallow, MIN_DEPTH, depth)
+    width = np.where(shallow, width, np.where(np.isnan(depth), np.nan, MAX_WIDTH))
+    return depth, width
@@ -0,0 +1,93 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from bearing_batch import evaluate_designs
+
+"""
+File: parallel.py
+
+Evaluates a large grid of footing designs on every core.
+
+The broadcast input columns are copied once into a shared memory block and the
+results are written by the workers straight into a second shared block, so no
+array is pickled on the way in or out; each task only carries the block names
+and its [start, stop) slice. Chunks are spread over a process pool and the
+results come back in the input order, together with the timing of every chunk.
+"""
+
+INPUT_COLUMNS = ["cohesion", "friction_angle", "unit_weight", "foundation_depth", "foundation_width",
+                 "number_of_floors", "building_area", "num_footings"]
+OUTPUT_COLUMNS = ["q_ult", "q_applied"]
+
+DEFAULT_CHUNK_SIZE = 250_000
+
+
+def evaluate_designs_parallel(cohesion, friction_angle, unit_weight, foundation_depth, foundation_width,
+                              number_of_floors, building_area, num_footings=1,
+                              workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parallel version of `bearing_batch.evaluate_designs`. The inputs are broadcast
+    against each other and flattened into one design per entry.
+
+    Args:
+        workers: number of worker processes (defaults to the number of cores)
+        chunk_size: number of designs per task
+
+    Returns:
+        a dict of flat arrays "q_ult", "q_applied" and "safe", in input order, and a list
+        with one dict per chunk holding "chunk", "start", "stop", "seconds" and "pid".
+    """
+    columns = np.broadcast_arrays(cohesion, friction_angle, unit_weight, foundation_depth, foundation_width,
+                                  number_of_floors, building_area, num_footings)
+    count = columns[0].size
+    workers = workers or os.cpu_count() or 1
+    bounds = [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+
+    inputs = shared_memory.SharedMemory(create=True, size=max(1, len(INPUT_COLUMNS) * count * 8))
+    outputs = shared_memory.SharedMemory(create=True, size=max(1, len(OUTPUT_COLUMNS) * count * 8))
+    try:
+        input_array = np.ndarray((len(INPUT_COLUMNS), count), dtype=np.float64, buffer=inputs.buf)
+        for row, column in enumerate(columns):
+            input_array[row] = column.ravel()
+
+        tasks = [(inputs.name, outputs.name, count, start, stop) for start, stop in bounds]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            timings = list(pool.map(_evaluate_chunk, tasks))
+        for chunk, timing in enumerate(timings):
+            timing["chunk"] = chunk
+
+        output_array = np.ndarray((len(OUTPUT_COLUMNS), count), dtype=np.float64, buffer=outputs.buf)
+        q_ult = output_array[0].copy()
+        q_applied = output_array[1].copy()
+        del input_array, output_array
+    finally:
+        inputs.close()
+        inputs.unlink()
+        outputs.close()
+        outputs.unlink()
+
+    results = {"q_ult": q_ult, "q_applied": q_applied, "safe": q_applied < q_ult}
+    return results, timings
+
+
+def _evaluate_chunk(task):
+    # Runs in a worker: read one slice of the inputs and write the matching slice of the outputs
+    input_name, output_name, count, start, stop = task
+    began = time.perf_counter()
+    inputs = shared_memory.SharedMemory(name=input_name)
+    outputs = shared_memory.SharedMemory(name=output_name)
+    try:
+        input_array = np.ndarray((len(INPUT_COLUMNS), count), dtype=np.float64, buffer=inputs.buf)
+        output_array = np.ndarray((len(OUTPUT_COLUMNS), count), dtype=np.float64, buffer=outputs.buf)
+        result = evaluate_designs(*input_array[:, start:stop])
+        output_array[0, start:stop] = result["q_ult"]
+        output_array[1, start:stop] = result["q_applied"]
+        del input_array, output_array
+    finally:
+        inputs.close()
+        outputs.close()
+    return {"start": start, "stop": stop, "seconds": time.perf_counter() - began, "pid": os.getpid()}
@@ -0,0 +1,174 @@
+import numpy as np
+
+"""
+File: particles.py
+
+Compact storage for soil particles. Instead of a Python list of
+(particle_id, x, y) tuples, every attribute is one contiguous NumPy array,
+so a settlement step over all particles is a handful of array operations.
+"""
+
+
+class ParticleStore:
+    """
+    Soil particles kept as parallel arrays: canvas item ids, x and y of each particle's
+    top-left corner, particle width and height, and a kind code (see `ParticleStore.KINDS`).
+    Particles without a canvas item of their own (raster soil) have an id of -1.
+
+    Iterating over a store, or indexing it with an int, still gives (particle_id, x, y)
+    tuples like the old list did. Indexing with a boolean mask, slice or index array
+    gives a new store holding copies of the selected particles.
+    """
+
+    KINDS = ("oval", "rectangle", "polygon")
+    """Particle kinds, in the order of their kind codes."""
+
+    NO_ID = -1
+    """Id used for particles that have no canvas item."""
+
+    def __init__(self, ids, x, y, width, height, kind):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.width = np.asarray(width, dtype=np.float64)
+        self.height = np.asarray(height, dtype=np.float64)
+        self.kind = np.asarray(kind, dtype=np.int8)
+
+    @classmethod
+    def from_shapes(cls, shapes, ids=None):
+        """
+        Builds a store from the output of `final_project.soil_particle_shapes`.
+
+        Args:
+            shapes: list of (kind, x, y, points, fill, outline)
+            ids: canvas item ids in the same order, or None if the particles have none
+        """
+        count = len(shapes)
+        x = np.empty(count)
+        y = np.empty(count)
+        width = np.empty(count)
+        height = np.empty(count)
+        kind = np.empty(count, dtype=np.int8)
+        for i, (shape_kind, shape_x, shape_y, points, fill, outline) in enumerate(shapes):
+            x[i] = shape_x
+            y[i] = shape_y
+            width[i] = max(points[0::2]) - min(points[0::2])
+            height[i] = max(points[1::2]) - min(points[1::2])
+            kind[i] = cls.KINDS.index(shape_kind)
+        if ids is None:
+            ids = np.full(count, cls.NO_ID)
+        return cls(ids, x, y, width, height, kind)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        for particle_id, x, y in zip(self.ids.tolist(), self.x.tolist(), self.y.tolist()):
+            yield (particle_id if particle_id != self.NO_ID else None), x, y
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            particle_id = int(self.ids[index])
+            return (particle_id if particle_id != self.NO_ID else None), float(self.x[index]), float(self.y[index])
+        return ParticleStore(self.ids[index], self.x[index], self.y[index],
+                             self.width[index], self.height[index], self.kind[index])
+
+    def move(self, dx, dy, mask=None):
+        """
+        Moves particles in place.
+
+        Args:
+            dx: change in x, a number or one value per moved particle
+            dy: change in y, a number or one value per moved particle
+            mask: boolean mask or index array of the particles to move, or None for all of them
+        """
+        if mask is None:
+            self.x += dx
+            self.y += dy
+        else:
+            self.x[mask] += dx
+            self.y[mask] += dy
+
+    def within_x(self, left_x, right_x):
+        """
+        Returns a boolean mask of the particles whose x lies in [left_x, right_x].
+        """
+        return (self.x >= left_x) & (self.x <= right_x)
+
+    def within(self, left_x, top_y, right_x, bottom_y):
+        """
+        Returns a boolean mask of the particles whose top-left corner lies inside the box.
+        """
+        return self.within_x(left_x, right_x) & (self.y >= top_y) & (self.y <= bottom_y)
+
+
+class FootingIndex:
+    """
+    Interval index over the horizontal extents of the footings, read from the canvas once
+    so that a settlement step does not query the canvas for every particle.
+
+    Footings may overlap. The number of footings above any x is the number of left edges
+    at or before x minus the number of right edges before x, which two binary searches
+    over the sorted edges answer for every particle at once. The edges also cut the x axis
+    into pieces covered by the same footings, and the deepest bottom over each piece and
+    each edge is worked out once, so `bottom_at` is one binary search as well.
+    """
+
+    def __init__(self, left_x, top_y, right_x, bottom_y):
+        """
+        Args:
+            left_x, top_y, right_x, bottom_y: one value per footing
+        """
+        order = np.argsort(left_x)
+        self.left_x = np.asarray(left_x, dtype=np.float64)[order]
+        self.top_y = np.asarray(top_y, dtype=np.float64)[order]
+        self.right_x = np.asarray(right_x, dtype=np.float64)[order]
+        self.bottom_y = np.asarray(bottom_y, dtype=np.float64)[order]
+        self.sorted_right_x = np.sort(self.right_x)
+
+        # Deepest bottom at each edge and over the open piece after it, -inf where no footing is
+        self.edges = np.unique(np.concatenate([self.left_x, self.right_x]))
+        self.edge_bottom = self._deepest_bottom(self.edges)
+        self.piece_bottom = self._deepest_bottom((self.edges[:-1] + self.edges[1:]) / 2)
+
+    @classmethod
+    def from_canvas(cls, canvas, foundation):
+        """
+        Builds the index from the rectangles returned by `final_project.draw_foundation`.
+        """
+        coords = np.array([canvas.coords(foundation_part)[:4] for foundation_part in foundation],
+                          dtype=np.float64).reshape(-1, 4)
+        return cls(coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3])
+
+    def __len__(self):
+        return len(self.left_x)
+
+    def count_covering(self, x):
+        """
+        Returns the number of footings whose [left_x, right_x] contains each x.
+        """
+        started = np.searchsorted(self.left_x, x, side="right")
+        ended = np.searchsorted(self.sorted_right_x, x, side="left")
+        return started - ended
+
+    def bottom_at(self, x):
+        """
+        Returns the deepest (largest) bottom y of the footings whose [left_x, right_x] contains
+        each x, or nan where `count_covering` is zero.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if len(self) == 0:
+            return np.full(x.shape, np.nan)
+        index = np.searchsorted(self.edges, x, side="left")
+        on_edge = (index < len(self.edges)) & (self.edges[np.minimum(index, len(self.edges) - 1)] == x)
+        inside = (index > 0) & (index < len(self.edges))
+        bottom = np.full(x.shape, -np.inf)
+        bottom[inside] = self.piece_bottom[index[inside] - 1]
+        bottom[on_edge] = self.edge_bottom[index[on_edge]]
+        bottom[np.isneginf(bottom)] = np.nan
+        return bottom
+
+    def _deepest_bottom(self, x):
+        # Footings x edges is small, the index is built once per settlement
+        covers = (self.left_x[None, :] <= x[:, None]) & (x[:, None] <= self.right_x[None, :])
+        return np.where(covers, self.bottom_y[None, :], -np.inf).max(axis=1, initial=-np.inf)
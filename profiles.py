@@ -0,0 +1,235 @@
+import math
+
+import numpy as np
+
+from bearing_batch import compute_bearing_factors_batch
+from soils import get_soil
+
+"""
+File: profiles.py
+
+Layered soil profiles, e.g. gravel over soft clay, instead of one uniform
+soil under the whole site.
+
+A SoilProfile is a list of layers from the ground surface down, each a soil
+code from soils.json and a thickness in m. The bottom layer carries on
+downwards. Every layer uses the median properties of its soil.
+
+ProfileSet holds any number of profiles as (profiles, layers) arrays and
+evaluates them all at once. Vertical stress is the cumulative sum of
+unit weight * thickness over the layers above, pore pressure is hydrostatic
+below the water table, and the bearing capacity of a footing uses the layers
+within its zone of influence, from the base of the footing down to one
+footing width below it:
+    c and φ are the thickness-weighted averages over the zone
+    q is the effective stress at the footing base
+    γ is the average effective unit weight over the zone
+    q_ult = c * Nc + q * Nq + 0.5 * γ * B * Ng
+For a single dry layer this is `final_project.compute_ultimate_capacity`.
+Unit weights are used as they are below the water table too (no separate
+saturated unit weight).
+
+Example:
+    profile = SoilProfile.parse("G:1.5,SC", water_table=2)
+    ProfileSet.from_profiles([profile]).ultimate_capacity(1.0, 1.5)
+"""
+
+WATER_UNIT_WEIGHT = 9.81
+
+
+class SoilProfile:
+    """
+    Soil layers from the ground surface down, as (soil code, thickness in m).
+    """
+
+    def __init__(self, layers, water_table=None):
+        """
+        Args:
+            layers: list of (soil code, thickness in m); the thickness of the last layer is ignored,
+                it carries on downwards
+            water_table: depth of the water table in m, or None if the ground is dry
+
+        Raises:
+            KeyError: if a soil code is not in the soil registry.
+            ValueError: if there are no layers or a thickness is not positive.
+        """
+        if not layers:
+            raise ValueError("a soil profile needs at least one layer")
+        self.layers = []
+        for i, (code, thickness) in enumerate(layers):
+            code = get_soil(code.upper()).code
+            if i < len(layers) - 1 and (thickness is None or thickness <= 0):
+                raise ValueError(f"layer {i + 1} ({code}) needs a thickness above 0 m")
+            self.layers.append((code, thickness))
+        self.water_table = water_table
+
+    @classmethod
+    def parse(cls, text, water_table=None):
+        """
+        Reads a profile written as "code:thickness" layers separated by commas, e.g. "G:1.5,SC".
+        The last layer needs no thickness.
+        """
+        layers = []
+        for layer in text.split(","):
+            code, _, thickness = layer.strip().partition(":")
+            layers.append((code, float(thickness) if thickness else None))
+        return cls(layers, water_table)
+
+    def codes(self):
+        return [code for code, thickness in self.layers]
+
+    def bands(self, top_y, bottom_y, scale):
+        """
+        Where each layer shows on the canvas when the ground surface is at top_y.
+
+        Args:
+            top_y, bottom_y: the part of the canvas covered by the soil
+            scale: canvas pixels per m
+
+        Returns:
+            a list of (soil code, band top y, band bottom y) for the layers that are visible.
+        """
+        bands = []
+        y = top_y
+        for i, (code, thickness) in enumerate(self.layers):
+            last = i == len(self.layers) - 1
+            layer_bottom = bottom_y if last else min(bottom_y, y + thickness * scale)
+            if layer_bottom > y:
+                bands.append((code, y, layer_bottom))
+            y = layer_bottom
+            if y >= bottom_y:
+                break
+        return bands
+
+    def __repr__(self):
+        return f"SoilProfile({self.layers!r}, water_table={self.water_table!r})"
+
+
+class ProfileSet:
+    """
+    Many soil profiles as arrays with one row per profile and one column per layer, so every calculation
+    is a few whole-array operations however many profiles there are.
+    """
+
+    def __init__(self, codes, thickness, water_table=None):
+        """
+        Args:
+            codes: soil codes, shape (profiles, layers)
+            thickness: layer thicknesses in m, same shape; the last column is taken to carry on downwards.
+                Layers with a thickness of 0 are skipped, which pads profiles with fewer layers.
+            water_table: depth of the water table in m per profile, or None / inf for dry ground
+        """
+        codes = np.asarray(codes, dtype=str)
+        self.thickness = np.array(thickness, dtype=float).reshape(codes.shape)
+        self.thickness[:, -1] = np.inf
+
+        # Look every distinct soil up once
+        unique_codes, inverse = np.unique(codes, return_inverse=True)
+        medians = np.array([get_soil(code).medians for code in unique_codes], dtype=float)
+        medians = medians[inverse.reshape(codes.shape)]
+        self.cohesion = medians[..., 0]
+        self.friction_angle = medians[..., 1]
+        self.unit_weight = medians[..., 2]
+
+        if water_table is None:
+            water_table = np.inf
+        self.water_table = np.broadcast_to(np.asarray(water_table, dtype=float), (len(codes),))
+
+        # Depth of the top of every layer, and the vertical stress there
+        self.top = np.zeros_like(self.thickness)
+        self.top[:, 1:] = np.cumsum(self.thickness[:, :-1], axis=1)
+        self.stress_at_top = np.zeros_like(self.thickness)
+        self.stress_at_top[:, 1:] = np.cumsum(self.unit_weight[:, :-1] * self.thickness[:, :-1], axis=1)
+
+    @classmethod
+    def from_profiles(cls, profiles):
+        """
+        Builds the arrays from a list of `SoilProfile`s, padding the shorter ones.
+        """
+        layers = max(len(profile.layers) for profile in profiles)
+        codes = []
+        thickness = np.zeros((len(profiles), layers))
+        for row, profile in enumerate(profiles):
+            profile_codes = profile.codes()
+            # Pad with 0 m of the bottom soil, which then carries on in the last column
+            codes.append(profile_codes + [profile_codes[-1]] * (layers - len(profile_codes)))
+            for column, (code, layer_thickness) in enumerate(profile.layers[:-1]):
+                thickness[row, column] = layer_thickness
+        water_table = [math.inf if profile.water_table is None else profile.water_table for profile in profiles]
+        return cls(codes, thickness, water_table)
+
+    def __len__(self):
+        return len(self.thickness)
+
+    def layer_index(self, depth):
+        """
+        Index of the layer each depth falls in. depth is broadcast against (profiles, 1), so it can be one
+        depth per profile, shape (profiles,), or several, shape (profiles, points).
+        """
+        depth = self._depth(depth)
+        # Layers of zero thickness start where the next one does, so the count skips over them
+        return (depth[..., None] >= self.top[:, None, :]).sum(axis=-1) - 1
+
+    def total_stress(self, depth):
+        """
+        Total vertical stress in kN/m² at the given depth(s) in m, see `ProfileSet.layer_index`.
+        """
+        depth = self._depth(depth)
+        index = self.layer_index(depth)
+        top = np.take_along_axis(self.top, index, axis=1)
+        stress_at_top = np.take_along_axis(self.stress_at_top, index, axis=1)
+        unit_weight = np.take_along_axis(self.unit_weight, index, axis=1)
+        return stress_at_top + unit_weight * (depth - top)
+
+    def pore_pressure(self, depth):
+        """
+        Hydrostatic pore water pressure in kN/m² at the given depth(s) in m.
+        """
+        depth = self._depth(depth)
+        return WATER_UNIT_WEIGHT * np.maximum(depth - self.water_table[:, None], 0)
+
+    def effective_stress(self, depth):
+        """
+        Effective vertical stress (total stress - pore pressure) in kN/m² at the given depth(s) in m.
+        """
+        return self.total_stress(depth) - self.pore_pressure(depth)
+
+    def zone_averages(self, foundation_depth, foundation_width):
+        """
+        Thickness-weighted averages of cohesion and friction angle over the zone of influence, from
+        foundation_depth down to foundation_depth + foundation_width, one per profile.
+        """
+        zone_top, zone_bottom = self._zone(foundation_depth, foundation_width)
+        bottom = self.top + self.thickness
+        overlap = np.clip(np.minimum(bottom, zone_bottom) - np.maximum(self.top, zone_top), 0, None)
+        weights = overlap / (zone_bottom - zone_top)
+        return (weights * self.cohesion).sum(axis=1), (weights * self.friction_angle).sum(axis=1)
+
+    def ultimate_capacity(self, foundation_depth, foundation_width):
+        """
+        Ultimate bearing capacity in kN/m² of a footing on every profile.
+
+        Args:
+            foundation_depth: depth of the footing base in m, a scalar or one per profile
+            foundation_width: footing width in m, a scalar or one per profile
+
+        Returns:
+            q_ult per profile.
+        """
+        zone_top, zone_bottom = self._zone(foundation_depth, foundation_width)
+        cohesion, friction_angle = self.zone_averages(foundation_depth, foundation_width)
+        Nc, Nq, Ng = compute_bearing_factors_batch(friction_angle)
+        overburden = self.effective_stress(zone_top)[:, 0]
+        width = (zone_bottom - zone_top)[:, 0]
+        unit_weight = (self.effective_stress(zone_bottom)[:, 0] - overburden) / width
+        return cohesion * Nc + overburden * Nq + 0.5 * unit_weight * width * Ng
+
+    def _depth(self, depth):
+        depth = np.asarray(depth, dtype=float)
+        if depth.ndim < 2:
+            depth = np.broadcast_to(depth.reshape(-1, 1), (len(self), 1))
+        return depth
+
+    def _zone(self, foundation_depth, foundation_width):
+        zone_top = self._depth(foundation_depth)
+        return zone_top, zone_top + self._depth(foundation_width)
@@ -0,0 +1,70 @@
+"""
+File: soil_raster.py
+
+Draws the soil and all of its particles into one off-screen PIL image that is
+shown as a single canvas image item. Loose sand has well over a thousand
+particles, and as separate canvas items every one of them has to be created
+through Tcl and slows down every later canvas operation.
+"""
+
+from particles import ParticleStore
+
+
+class SoilRaster(ParticleStore):
+    """
+    A `ParticleStore`, like the one `draw_soil` returns, whose particles are drawn
+    as one image. Particles have no canvas item of their own, so their ids are
+    `ParticleStore.NO_ID`; after moving particles, call `redraw` to repaint the
+    image in place.
+    """
+
+    def __init__(self, canvas, color, shapes, left_x, top_y, right_x, bottom_y, bands=()):
+        """
+        Args:
+            canvas: the canvas to draw on
+            color: background color of the soil
+            shapes: the particles, as returned by `final_project.soil_particle_shapes`
+            left_x, top_y, right_x, bottom_y: the area of the canvas covered by the soil
+            bands: (band top y, band bottom y, color) of soil layers painted over the background
+        """
+        store = ParticleStore.from_shapes(shapes)
+        super().__init__(store.ids, store.x, store.y, store.width, store.height, store.kind)
+        self.canvas = canvas
+        self.color = color
+        self.bands = list(bands)
+        self.shapes = [(kind, points, fill, outline) for kind, x, y, points, fill, outline in shapes]
+        self.left_x = left_x
+        self.top_y = top_y
+        self.size = (int(right_x - left_x), int(bottom_y - top_y))
+        self.image_id = canvas.create_image_from_pil(left_x, top_y, self.render())
+
+    def render(self):
+        """
+        Paints the soil background and every particle at its current position.
+
+        Returns:
+            the PIL image.
+        """
+        from PIL import Image
+        from PIL import ImageDraw
+        image = Image.new("RGB", self.size, self.color)
+        draw = ImageDraw.Draw(image)
+        for band_top, band_bottom, color in self.bands:
+            draw.rectangle([0, band_top - self.top_y, self.size[0], band_bottom - self.top_y], fill=color)
+        xs = (self.x - self.left_x).tolist()
+        ys = (self.y - self.top_y).tolist()
+        for x, y, (kind, points, fill, outline) in zip(xs, ys, self.shapes):
+            absolute = [value + (x if i % 2 == 0 else y) for i, value in enumerate(points)]
+            if kind == "oval":
+                draw.ellipse(absolute, fill=fill, outline=outline)
+            elif kind == "rectangle":
+                draw.rectangle(absolute, fill=fill, outline=outline)
+            else:
+                draw.polygon(absolute, fill=fill, outline=outline)
+        return image
+
+    def redraw(self):
+        """
+        Repaints the image after particles have moved.
+        """
+        self.canvas.set_pil_image(self.image_id, self.render())
@@ -0,0 +1,171 @@
+import json
+import os
+
+import final_project
+
+"""
+File: soils.py
+
+The soils you can build on, read from soils.json instead of being spread
+over module-level lists and if/elif chains.
+
+Each soil has a code (what the user types, e.g. "LS"), a name, the
+[min, max] ranges of cohesion (kPa), friction angle (degrees) and unit
+weight (kN/m³), the colour and particle style it is drawn with, its pros and
+cons, and optionally whether it is prone to settlement and its consolidation
+coefficients. The medians of the ranges and the bearing factors at the median
+friction angle are worked out once when the soil is loaded, and again by
+refresh_registry.
+
+To add a soil, add an entry to soils.json, or put the new entries in a file
+of your own and list it in the STAND_OR_SINK_SOILS environment variable
+(several files separated by os.pathsep). Entries with the code of an
+existing soil replace it.
+
+Example:
+    soil = get_soil("SC")
+    soil.name, soil.medians, soil.bearing_factors
+"""
+
+SOILS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "soils.json")
+SOILS_ENV_VAR = "STAND_OR_SINK_SOILS"
+
+REQUIRED_FIELDS = ["code", "name", "cohesion", "friction_angle", "unit_weight", "color", "particles",
+                   "pros_and_cons"]
+
+
+class Soil:
+    """
+    One soil type. Besides the fields of its soils.json entry it has
+        characteristics: [c_min, c_max, φ_min, φ_max, γ_min, γ_max], the layout of the old soil lists
+        medians: median cohesion, friction angle and unit weight
+        bearing_factors: Nc, Nq and Ng at the median friction angle
+    """
+
+    def __init__(self, entry):
+        """
+        Args:
+            entry: a dict as found in soils.json
+
+        Raises:
+            ValueError: if a required field is missing or a range is not [min, max].
+        """
+        missing = [field for field in REQUIRED_FIELDS if field not in entry]
+        if missing:
+            raise ValueError(f"soil {entry.get('code', '?')!r} is missing {', '.join(missing)}")
+        self.code = str(entry["code"]).upper()
+        self.name = entry["name"]
+        self.cohesion = _range(entry, "cohesion")
+        self.friction_angle = _range(entry, "friction_angle")
+        self.unit_weight = _range(entry, "unit_weight")
+        self.color = entry["color"]
+        self.particles = entry["particles"]
+        self.pros_and_cons = entry["pros_and_cons"]
+        self.settlement_prone = bool(entry.get("settlement_prone", False))
+        self.consolidation = entry.get("consolidation")
+
+        self.characteristics = self.cohesion + self.friction_angle + self.unit_weight
+        self.refresh()
+
+    def refresh(self):
+        """
+        Works out the medians and bearing factors again with the current `final_project` functions, after
+        `final_project.compute_bearing_factors` or `final_project.compute_median_properties` was replaced.
+        """
+        self.medians = final_project.compute_median_properties(self.characteristics)
+        self.bearing_factors = final_project.compute_bearing_factors(self.medians[1])
+
+    def ultimate_capacity(self, foundation_depth, foundation_width):
+        """
+        q_ult = c * Nc + gamma * D * Nq + 0.5 * gamma * B * Ng with the median properties, like
+        `final_project.compute_ultimate_capacity`. Depth and width are in m.
+        """
+        cohesion, friction_angle, unit_weight = self.medians
+        Nc, Nq, Ng = self.bearing_factors
+        return cohesion * Nc + unit_weight * foundation_depth * Nq + 0.5 * unit_weight * foundation_width * Ng
+
+    def __repr__(self):
+        return f"Soil({self.code!r}, {self.name!r})"
+
+
+class SoilRegistry:
+    """
+    Soils by code, in the order they were added. Supports `registry[code]`, `code in registry`, `len` and
+    iterating over the soils.
+    """
+
+    def __init__(self, soils=()):
+        self.soils = {}
+        for soil in soils:
+            self.add(soil)
+
+    def add(self, soil):
+        self.soils[soil.code] = soil
+
+    def load(self, file_path):
+        """
+        Adds every soil in a JSON file holding a list of soil entries.
+        """
+        with open(file_path, encoding="utf-8") as soils_file:
+            for entry in json.load(soils_file):
+                self.add(Soil(entry))
+
+    def codes(self):
+        return list(self.soils)
+
+    def __getitem__(self, code):
+        return self.soils[code]
+
+    def __contains__(self, code):
+        return code in self.soils
+
+    def __iter__(self):
+        return iter(self.soils.values())
+
+    def __len__(self):
+        return len(self.soils)
+
+
+_registry = None
+
+
+def get_registry():
+    """
+    Returns the registry of soils.json and the files listed in `SOILS_ENV_VAR`, loaded on first use.
+    """
+    global _registry
+    if _registry is None:
+        registry = SoilRegistry()
+        registry.load(SOILS_FILE)
+        for file_path in os.environ.get(SOILS_ENV_VAR, "").split(os.pathsep):
+            if file_path:
+                registry.load(file_path)
+        _registry = registry
+    return _registry
+
+
+def refresh_registry():
+    """
+    Calls `Soil.refresh` on every loaded soil. Does nothing if the registry was not loaded yet, it will use the
+    current functions when it is.
+    """
+    if _registry is not None:
+        for soil in _registry:
+            soil.refresh()
+
+
+def get_soil(code):
+    """
+    Returns the `Soil` with the given code.
+
+    Raises:
+        KeyError: if there is no such soil.
+    """
+    return get_registry()[code]
+
+
+def _range(entry, field):
+    values = entry[field]
+    if len(values) != 2 or values[0] > values[1]:
+        raise ValueError(f"{field} of soil {entry['code']!r} must be [min, max]")
+    return [values[0], values[1]]
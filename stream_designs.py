@@ -0,0 +1,234 @@
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+
+from final_project import evaluate_design
+from soils import get_registry
+
+"""
+File: stream_designs.py
+
+Non-interactive batch mode for the Stand or Sink bearing check.
+Reads design scenarios from a CSV or JSONL file (or stdin), runs each one
+through the same soil lookup, pressure and bearing checks as main, and
+writes one result per input record. Records are processed one at a time,
+so memory use stays constant however long the input is, and nothing here
+opens a Tk window or pauses between steps.
+
+Each record has the fields below. Depth and width are in mm, exactly as the
+interactive program asks for them:
+    soil_type, foundation_depth, foundation_width, number_of_floors,
+    building_area (default 100), foundation_type (R or I),
+    num_footings (default 1, ignored for R)
+
+Example:
+    python stream_designs.py designs.csv --output results.jsonl
+    cat designs.jsonl | python stream_designs.py - --input-format jsonl --output-format csv
+    python stream_designs.py designs.csv --cache designs.sqlite   # reuse results of earlier runs
+"""
+
+FIELDS = ["soil_type", "foundation_depth", "foundation_width", "number_of_floors",
+          "building_area", "foundation_type", "num_footings"]
+RESULT_FIELDS = FIELDS + ["soil_name", "q_applied", "q_ult", "safe", "error"]
+
+
+def parse_design(record):
+    """
+    Validates a raw record using the same limits as the interactive prompts.
+
+    Args:
+        record: a dict of field name -> value as read from CSV or JSONL
+
+    Returns:
+        the design as a dict with typed values, depth and width converted to m.
+
+    Raises:
+        ValueError: if a field is missing or outside the allowed range.
+    """
+    soil_type = str(record.get("soil_type", "")).strip().upper()
+    if soil_type not in get_registry():
+        raise ValueError(f"invalid soil_type {record.get('soil_type')!r}")
+
+    foundation_type = str(record.get("foundation_type", "")).strip().upper()
+    if foundation_type not in ("R", "I"):
+        raise ValueError(f"invalid foundation_type {record.get('foundation_type')!r}")
+
+    foundation_depth = _number(record, "foundation_depth")
+    if not 600 <= foundation_depth <= 3000:
+        raise ValueError("foundation_depth must be between 600 mm and 3000 mm")
+
+    foundation_width = _number(record, "foundation_width")
+    if not 300 <= foundation_width <= 1500:
+        raise ValueError("foundation_width must be between 300 mm and 1500 mm")
+
+    number_of_floors = _whole_number(record, "number_of_floors")
+    if not 1 <= number_of_floors <= 4:
+        raise ValueError("number_of_floors must be between 1 and 4")
+
+    building_area = _number(record, "building_area", default=100)
+    if building_area < 1:
+        raise ValueError("building_area must be at least 1 m²")
+
+    num_footings = _whole_number(record, "num_footings", default=1)
+    if num_footings < 1:
+        raise ValueError("num_footings must be at least 1")
+
+    return {
+        "soil_type": soil_type,
+        "foundation_depth": foundation_depth / 1000,
+        "foundation_width": foundation_width / 1000,
+        "number_of_floors": number_of_floors,
+        "building_area": building_area,
+        "foundation_type": foundation_type,
+        "num_footings": num_footings,
+    }
+
+
+def _number(record, field, default=None):
+    value = record.get(field)
+    if value is None or value == "":
+        if default is None:
+            raise ValueError(f"missing {field}")
+        return float(default)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} is not a number: {value!r}")
+    # inf and nan would get past the range checks and end up in the output
+    if not math.isfinite(number):
+        raise ValueError(f"{field} must be a finite number, not {value!r}")
+    return number
+
+
+def _whole_number(record, field, default=None):
+    number = _number(record, field, default)
+    if not number.is_integer():
+        raise ValueError(f"{field} must be a whole number, not {record.get(field)!r}")
+    return int(number)
+
+
+def evaluate_record(record, cache=None, line_number=None):
+    """
+    Evaluates one raw record. Invalid records are reported in the "error" field
+    instead of stopping the stream, as are JSONL lines read_records could not
+    decode (given as the json.JSONDecodeError) and JSON values that are not
+    objects, with their line number. With a design_cache.DesignCache, designs evaluated
+    before are answered from it.
+    """
+    if not isinstance(record, dict):
+        result = {field: None for field in FIELDS}
+        if isinstance(record, json.JSONDecodeError):
+            result["error"] = f"line {line_number}: invalid JSON: {record}"
+        else:
+            result["error"] = f"line {line_number}: expected a JSON object, not {type(record).__name__}"
+        return result
+    result = {field: record.get(field) for field in FIELDS}
+    try:
+        design = parse_design(record)
+    except ValueError as error:
+        result["error"] = str(error)
+        return result
+    result.update(cache.evaluate(**design) if cache else evaluate_design(**design))
+    return result
+
+
+def read_records(stream, input_format):
+    """
+    Yields (line number, record) one at a time from a CSV or JSONL text stream.
+    A JSONL line that is not valid JSON gives its json.JSONDecodeError as the
+    record, so one bad line does not stop the stream.
+    """
+    if input_format == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as error:
+                yield line_number, error
+
+
+def write_results(results, stream, output_format):
+    """
+    Writes results as they are produced and returns the number written.
+    """
+    count = 0
+    if output_format == "csv":
+        writer = csv.DictWriter(stream, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for result in results:
+            writer.writerow(result)
+            count += 1
+    else:
+        for result in results:
+            stream.write(json.dumps(result, ensure_ascii=False))
+            stream.write("\n")
+            count += 1
+    return count
+
+
+def stream_designs(input_stream, output_stream, input_format="csv", output_format="jsonl", cache=None):
+    """
+    Streams every record of input_stream through the bearing check into output_stream,
+    using cache (a design_cache.DesignCache) if given.
+
+    Returns:
+        the number of records written.
+    """
+    results = (evaluate_record(record, cache, line_number)
+               for line_number, record in read_records(input_stream, input_format))
+    return write_results(results, output_stream, output_format)
+
+
+def _guess_format(path, default):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Stand or Sink bearing check over a file of designs.")
+    parser.add_argument("input", help="CSV or JSONL file of designs, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout (default)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"], help="defaults to the input file extension")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="defaults to the output file extension")
+    parser.add_argument("--cache", metavar="FILE",
+                        help="remember results in this SQLite file and reuse them on later runs")
+    args = parser.parse_args(argv)
+
+    input_format = args.input_format or _guess_format(args.input, "csv")
+    output_format = args.output_format or _guess_format(args.output, "jsonl")
+
+    input_stream = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    cache = None
+    if args.cache:
+        from design_cache import DesignCache
+        cache = DesignCache(args.cache)
+    try:
+        stream_designs(input_stream, output_stream, input_format, output_format, cache)
+    finally:
+        if cache is not None:
+            stats = cache.stats()
+            cache.close()
+            print(f"Cache: {stats['hit_rate']:.1%} hit rate ({stats['memory_hits']} in memory, "
+                  f"{stats['disk_hits']} from {args.cache}, {stats['misses']} evaluated)", file=sys.stderr)
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+
+if __name__ == '__main__':
+    main()
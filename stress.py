@@ -0,0 +1,155 @@
+import numpy as np
+
+from particles import FootingIndex
+
+"""
+File: stress.py
+
+How the building's weight spreads into the soil: the vertical stress
+increase below the footings from Boussinesq's solution for a uniformly
+loaded rectangle, on a grid over the vertical section through the footings.
+
+Every footing is a square in plan as wide as it is drawn, loaded with
+q_applied. The stress at a point of the section is found with Newmark's
+corner influence factor, adding and subtracting the rectangles that have a
+corner above the point, so points beside a footing are handled too. All
+grid points and footings are evaluated in one broadcast, and the footings
+are added up (superposed).
+
+StressBulb draws the field as one colour-mapped image item, the stress
+bulb, with optional contour lines, and can recompute it when the load
+changes. Drawing needs Pillow.
+"""
+
+# Colours for stress / q_applied from 0 to 1: blue, cyan, green, yellow, red
+COLOR_STOPS = [0.0, 0.25, 0.5, 0.75, 1.0]
+COLORS = np.array([[0, 0, 255], [0, 255, 255], [0, 255, 0], [255, 255, 0], [255, 0, 0]])
+# Low stresses fade out so the soil stays visible where nothing happens
+MAX_ALPHA = 170
+FADE_BELOW = 0.5
+
+DEFAULT_CONTOURS = (0.1, 0.2, 0.5)
+CONTOUR_COLOR = (0, 0, 0, 255)
+
+
+def corner_influence(m, n):
+    """
+    Newmark's influence factor for the vertical stress below a corner of a uniformly loaded rectangle,
+    with m and n the rectangle sides divided by the depth. Odd in m and n, so a negative side subtracts.
+    """
+    m2n2 = m ** 2 + n ** 2
+    root = np.sqrt(m2n2 + 1)
+    first = 2 * m * n * root / (m2n2 + m ** 2 * n ** 2 + 1) * (m2n2 + 2) / (m2n2 + 1)
+    second = np.arctan2(2 * m * n * root, m2n2 + 1 - m ** 2 * n ** 2)
+    return (first + second) / (4 * np.pi)
+
+
+def vertical_stress(x, z, left_x, right_x, breadth, q_applied):
+    """
+    Vertical stress increase in the section through the middle of the footings.
+
+    Args:
+        x, z: positions of the points in m, z measured down from the footing base; any broadcastable shapes
+        left_x, right_x: horizontal extent of each footing in m
+        breadth: size of each footing across the section in m
+        q_applied: pressure under each footing in kN/m²
+
+    Returns:
+        the stress increase in kN/m² at every point, summed over the footings. Points at or above the footing
+        base get 0.
+    """
+    x = np.asarray(x, dtype=float)[..., None]
+    z = np.asarray(z, dtype=float)[..., None]
+    left_x, right_x, breadth, q_applied = np.broadcast_arrays(*[np.asarray(value, dtype=float)
+                                                                for value in (left_x, right_x, breadth, q_applied)])
+    below = z > 0
+    depth = np.where(below, z, 1.0)
+    n = breadth / 2 / depth
+    # Two rectangles on either side of the section line, each spanning [left_x, right_x]
+    influence = 2 * (corner_influence((right_x - x) / depth, n) - corner_influence((left_x - x) / depth, n))
+    return np.where(below, q_applied * influence, 0.0).sum(axis=-1)
+
+
+def colorize(ratio, contours=DEFAULT_CONTOURS):
+    """
+    Maps stress ratios (stress / q_applied) to RGBA pixels, with contour lines where the ratio crosses each
+    of the given levels.
+    """
+    ratio = np.clip(ratio, 0, 1)
+    pixels = np.empty(ratio.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        pixels[..., channel] = np.interp(ratio, COLOR_STOPS, COLORS[:, channel])
+    pixels[..., 3] = MAX_ALPHA * np.minimum(ratio / FADE_BELOW, 1)
+
+    for level in contours:
+        above = ratio >= level
+        edge = np.zeros_like(above)
+        edge[:, :-1] |= above[:, :-1] != above[:, 1:]
+        edge[:-1, :] |= above[:-1, :] != above[1:, :]
+        pixels[edge] = CONTOUR_COLOR
+    return pixels
+
+
+class StressBulb:
+    """
+    The stress field below the footings drawn by `final_project.draw_foundation`, shown as one image item
+    covering a box of the canvas.
+    """
+
+    def __init__(self, canvas, foundation, q_applied, scale, left_x, top_y, right_x, bottom_y,
+                 resolution=2, contours=DEFAULT_CONTOURS):
+        """
+        Args:
+            canvas: the canvas to draw on
+            foundation: the footing rectangles returned by `final_project.draw_foundation`
+            q_applied: pressure under the footings in kN/m²
+            scale: canvas pixels per m
+            left_x, top_y, right_x, bottom_y: the area of the canvas to cover
+            resolution: grid spacing in pixels; the image is scaled up from the grid
+            contours: stress / q_applied levels to outline, or () for none
+        """
+        self.canvas = canvas
+        self.foundation = foundation
+        self.q_applied = q_applied
+        self.scale = scale
+        self.left_x = left_x
+        self.top_y = top_y
+        self.size = (int(right_x - left_x), int(bottom_y - top_y))
+        self.resolution = resolution
+        self.contours = contours
+        self.image_id = canvas.create_image_from_pil(left_x, top_y, self.render())
+
+    def compute(self):
+        """
+        Returns the stress increase in kN/m² on the grid, one row per grid row from the top.
+        """
+        footings = FootingIndex.from_canvas(self.canvas, self.foundation)
+        # Grid points at the middle of each resolution x resolution block of pixels
+        x = self.left_x + (np.arange(0, self.size[0], self.resolution) + self.resolution / 2)
+        y = self.top_y + (np.arange(0, self.size[1], self.resolution) + self.resolution / 2)
+        base = footings.bottom_y.max(initial=self.top_y)
+        return vertical_stress(x[None, :] / self.scale, (y[:, None] - base) / self.scale,
+                               footings.left_x / self.scale, footings.right_x / self.scale,
+                               (footings.right_x - footings.left_x) / self.scale, self.q_applied)
+
+    def render(self):
+        """
+        Computes the field and paints it.
+
+        Returns:
+            the PIL image.
+        """
+        from PIL import Image
+        ratio = self.compute() / self.q_applied if self.q_applied else np.zeros((1, 1))
+        image = Image.fromarray(colorize(ratio, self.contours), "RGBA")
+        return image.resize(self.size, Image.NEAREST)
+
+    def update(self, q_applied=None, foundation=None):
+        """
+        Recomputes and repaints the field, after the load or the footings changed.
+        """
+        if q_applied is not None:
+            self.q_applied = q_applied
+        if foundation is not None:
+            self.foundation = foundation
+        self.canvas.set_pil_image(self.image_id, self.render())
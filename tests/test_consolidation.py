@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from consolidation import LAYER_THICKNESS, TridiagonalSolver, settlement_curve, terzaghi_degree
+from soils import get_soil
+
+# Largest |U - U_terzaghi| allowed at the default grid, 1000 depth intervals and 1000 steps over 50 years
+TOLERANCE = 3e-4
+
+
+@pytest.mark.parametrize("soil_type", ["SC", "SIC"])
+@pytest.mark.parametrize("drainage", ["double", "single"])
+def test_degree_of_consolidation_matches_terzaghi(soil_type, drainage):
+    # A footing much wider than the layer loads it uniformly, as Terzaghi's solution assumes
+    curve = settlement_curve(soil_type, 100.0, 1e7, drainage=drainage)
+    degree = curve["settlement"] / curve["final_settlement"]
+    drainage_path = LAYER_THICKNESS / 2 if drainage == "double" else LAYER_THICKNESS
+    time_factor = get_soil(soil_type).consolidation["cv"] * curve["time"] / drainage_path ** 2
+    expected = terzaghi_degree(time_factor)
+    expected[0] = 0.0 # the truncated series is not exactly 0 at Tv = 0
+    assert np.abs(degree - expected).max() < TOLERANCE
+
+
+def test_footings_are_solved_independently():
+    together = settlement_curve("SC", [100.0, 200.0], [1.0, 2.0], nodes=200, steps=200)
+    for i, (q_applied, width) in enumerate([(100.0, 1.0), (200.0, 2.0)]):
+        alone = settlement_curve("SC", q_applied, width, nodes=200, steps=200)
+        np.testing.assert_allclose(together["settlement"][:, i], alone["settlement"], rtol=1e-12)
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 100])
+def test_tridiagonal_solver_matches_dense_solve(size):
+    rng = np.random.default_rng(size)
+    lower = rng.uniform(-1, 0, size)
+    upper = rng.uniform(-1, 0, size)
+    diagonal = 3 + rng.uniform(0, 1, size)
+    lower[0] = upper[-1] = 0.0
+    matrix = np.diag(diagonal) + np.diag(lower[1:], -1) + np.diag(upper[:-1], 1)
+    rhs = rng.normal(size=(size, 3))
+    solver = TridiagonalSolver(lower, diagonal, upper)
+    np.testing.assert_allclose(solver.solve(rhs), np.linalg.solve(matrix, rhs), rtol=1e-10, atol=1e-12)
+
+    padded = np.zeros((solver.padded, 3))
+    padded[:size] = rhs
+    np.testing.assert_allclose(solver.multiply_padded(padded)[:size], matrix @ rhs, rtol=1e-12)
@@ -0,0 +1,65 @@
+import functools
+
+import pytest
+
+import final_project
+from design_cache import DesignCache
+from soils import refresh_registry
+
+DESIGN = ("SC", 1.0, 1.5, 2, 100, "I", 4)
+
+
+@pytest.fixture
+def restore_formulas():
+    floor_weight = final_project.FLOOR_WEIGHT
+    compute_bearing_factors = final_project.compute_bearing_factors
+    yield
+    final_project.FLOOR_WEIGHT = floor_weight
+    final_project.compute_bearing_factors = compute_bearing_factors
+    refresh_registry()
+
+
+def test_results_match_evaluate_design_and_persist(tmp_path):
+    file_path = tmp_path / "designs.sqlite"
+    with DesignCache(file_path) as cache:
+        assert cache.evaluate(*DESIGN) == final_project.evaluate_design(*DESIGN)
+        assert cache.evaluate(*DESIGN) == final_project.evaluate_design(*DESIGN)
+        assert cache.stats()["memory_hits"] == 1
+    with DesignCache(file_path) as cache:
+        assert cache.evaluate(*DESIGN) == final_project.evaluate_design(*DESIGN)
+        assert cache.stats()["disk_hits"] == 1
+
+
+def test_floor_weight_change_invalidates(tmp_path, restore_formulas):
+    with DesignCache(tmp_path / "designs.sqlite") as cache:
+        before = cache.evaluate(*DESIGN)
+        final_project.FLOOR_WEIGHT = 2 * final_project.FLOOR_WEIGHT
+        after = cache.evaluate(*DESIGN)
+        assert after["q_applied"] == pytest.approx(2 * before["q_applied"])
+        assert cache.stats()["misses"] == 2
+
+
+def test_bearing_factor_change_invalidates_memory_and_file(tmp_path, restore_formulas):
+    file_path = tmp_path / "designs.sqlite"
+    with DesignCache(file_path) as cache:
+        before = cache.evaluate(*DESIGN)
+
+        original = final_project.compute_bearing_factors
+        final_project.compute_bearing_factors = functools.lru_cache()(
+            lambda friction_angle: tuple(2 * factor for factor in original(friction_angle)))
+        doubled = cache.evaluate(*DESIGN)
+        # Every term of q_ult is proportional to a bearing factor
+        assert doubled["q_ult"] == pytest.approx(2 * before["q_ult"])
+        assert doubled == final_project.evaluate_design(*DESIGN)
+        assert cache.stats()["stored"] == 1
+
+    # A later run with the doubled factors reads back the doubled result
+    with DesignCache(file_path) as cache:
+        assert cache.evaluate(*DESIGN)["q_ult"] == pytest.approx(2 * before["q_ult"])
+        assert cache.stats()["disk_hits"] == 1
+
+    # and going back to the original factors does not serve it
+    final_project.compute_bearing_factors = original
+    with DesignCache(file_path) as cache:
+        assert cache.evaluate(*DESIGN) == before
+        assert cache.stats()["misses"] == 1
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+from design_server import MAX_HEADERS, DesignServer
+
+
+async def exchange(raw_request):
+    # Sends raw bytes to a server on a free port and returns (status, JSON body) of the answer
+    server = await DesignServer().start("127.0.0.1", 0)
+    try:
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        writer.write(raw_request)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        body = json.loads(await reader.readexactly(length))
+        writer.close()
+        return status, body
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def test_evaluates_a_design():
+    body = json.dumps({"soil_type": "SC", "foundation_depth": 1000, "foundation_width": 1500,
+                       "number_of_floors": 2, "building_area": 100, "foundation_type": "I",
+                       "num_footings": 4}).encode("utf-8")
+    status, result = asyncio.run(exchange(b"POST /evaluate HTTP/1.1\r\nContent-Length: %d\r\n\r\n"
+                                          % len(body) + body))
+    assert status == 200
+    assert result["safe"] in (True, False)
+
+
+def test_negative_content_length_is_a_bad_request(capsys):
+    status, result = asyncio.run(exchange(b"POST /evaluate HTTP/1.1\r\nContent-Length: -5\r\n\r\n"))
+    assert status == 400
+    assert result == {"error": "invalid Content-Length"}
+    assert capsys.readouterr().err == ""
+
+
+def test_too_many_header_lines(capsys):
+    headers = b"".join(b"X-Header-%d: 1\r\n" % number for number in range(MAX_HEADERS + 1))
+    status, result = asyncio.run(exchange(b"GET /health HTTP/1.1\r\n" + headers + b"\r\n"))
+    assert status == 431
+    assert capsys.readouterr().err == ""
+
+
+def test_header_line_longer_than_the_reader_limit(capsys):
+    status, result = asyncio.run(exchange(b"GET /health HTTP/1.1\r\nX-Long: " + b"a" * 100000 + b"\r\n\r\n"))
+    assert status == 431
+    assert result == {"error": "header line too long"}
+    assert capsys.readouterr().err == ""
+
+
+def test_headers_up_to_the_limit_are_fine():
+    headers = b"".join(b"X-Header-%d: 1\r\n" % number for number in range(MAX_HEADERS))
+    assert asyncio.run(exchange(b"GET /health HTTP/1.1\r\n" + headers + b"\r\n")) == (200, {"status": "ok"})
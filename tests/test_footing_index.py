@@ -0,0 +1,27 @@
+import numpy as np
+
+from particles import FootingIndex
+
+
+def test_overlapping_footings_use_the_deepest_bottom():
+    # A deep footing from 0 to 100 with a shallow one from 50 to 70 on top of it
+    footings = FootingIndex([0, 50], [0, 0], [100, 70], [80, 20])
+    x = np.array([-1, 0, 40, 50, 60, 70, 90, 100, 101])
+    assert footings.count_covering(x).tolist() == [0, 1, 1, 2, 2, 2, 1, 1, 0]
+    np.testing.assert_array_equal(footings.bottom_at(x), [np.nan, 80, 80, 80, 80, 80, 80, 80, np.nan])
+
+
+def test_bottom_at_matches_brute_force():
+    rng = np.random.default_rng(2024)
+    for _ in range(100):
+        count = rng.integers(0, 6)
+        left_x = rng.integers(0, 50, count).astype(float)
+        right_x = left_x + rng.integers(0, 30, count)
+        bottom_y = rng.integers(0, 100, count).astype(float)
+        footings = FootingIndex(left_x, np.zeros(count), right_x, bottom_y)
+
+        x = np.concatenate([rng.uniform(-5, 90, 50), left_x, right_x])
+        covers = (left_x <= x[:, None]) & (x[:, None] <= right_x)
+        expected = np.where(covers.any(axis=1), np.where(covers, bottom_y, -np.inf).max(axis=1, initial=-np.inf),
+                            np.nan)
+        np.testing.assert_array_equal(footings.bottom_at(x), expected)
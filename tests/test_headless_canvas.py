@@ -0,0 +1,46 @@
+import tkinter
+
+import pytest
+
+from graphics import HeadlessCanvas
+
+
+@pytest.fixture
+def canvas():
+    canvas = HeadlessCanvas(100, 100)
+    return canvas, [canvas.create_rectangle(0, 0, 1, 1) for _ in range(4)]
+
+
+def test_raise_and_lower_to_the_ends(canvas):
+    canvas, (a, b, c, d) = canvas
+    canvas.tag_raise(a)
+    assert canvas.find_all() == (b, c, d, a)
+    canvas.tag_lower(d)
+    assert canvas.find_all() == (d, b, c, a)
+
+
+def test_raise_above_and_lower_below(canvas):
+    canvas, (a, b, c, d) = canvas
+    canvas.tag_raise(a, b)
+    assert canvas.find_all() == (b, a, c, d)
+    canvas.tag_lower(d, a)
+    assert canvas.find_all() == (b, d, a, c)
+    canvas.raise_in_front_of(b, c)
+    assert canvas.find_all() == (d, a, c, b)
+    canvas.lower_behind(c, d)
+    assert canvas.find_all() == (c, d, a, b)
+
+
+def test_reference_must_exist(canvas):
+    canvas, (a, _, _, _) = canvas
+    with pytest.raises(tkinter.TclError):
+        canvas.tag_raise(a, "missing")
+    with pytest.raises(tkinter.TclError):
+        canvas.tag_lower(a, "missing")
+
+
+def test_polygon_points_may_be_nested():
+    canvas = HeadlessCanvas(100, 100)
+    flat = canvas.create_polygon(0, 0, 10, 0, 10, 10)
+    pairs = canvas.create_polygon([(0, 0), (10, 0), [10, 10]])
+    assert canvas.coords(flat) == canvas.coords(pairs) == [0, 0, 10, 0, 10, 10]